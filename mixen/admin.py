@@ -1,14 +1,52 @@
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.paginator import Paginator
+from django.db.models import Max, Min
+from django.utils.functional import cached_property
 from django.utils import timezone
 from django.core.mail import send_mail
-from .models import User, Profile, ProfileImage, VerificationVideo, Like, Match, RejectionReason
+from .models import (
+    User, Profile, ProfileImage, VerificationVideo, Like, Match, RejectionReason, AccountDeletion,
+    Block, Report,
+)
+from .search import filter_by_search
+
+# -------------------------
+# Fast Changelists
+# -------------------------
+class EstimatedCountPaginator(Paginator):
+    """
+    An unfiltered changelist of a large table is counted from the primary
+    key range (two index lookups) instead of COUNT(*), which reads every
+    row. Deleted rows make it an overestimate, harmless for page links.
+    Filtered lists and small tables keep the exact count.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            bounds = queryset.model._default_manager.using(queryset.db).aggregate(low=Min("pk"), high=Max("pk"))
+            if bounds["high"] is None:
+                return 0
+            estimate = bounds["high"] - bounds["low"] + 1
+            if estimate > settings.ADMIN_EXACT_COUNT_LIMIT:
+                return estimate
+        return super().count
+
+
+class FastChangeListMixin:
+    paginator = EstimatedCountPaginator
+    # Skips the extra unfiltered COUNT(*) behind "N results (M total)".
+    show_full_result_count = False
+
 
 # -------------------------
 # Admin Actions
 # -------------------------
 def approve_profiles(modeladmin, request, queryset):
-    for profile in queryset:
+    for profile in queryset.select_related("user"):
         profile.status = "APPROVED"
         profile.reviewed_at = timezone.now()
         profile.rejection_reason = ""
@@ -26,7 +64,7 @@ approve_profiles.short_description = "Approve selected profiles"
 
 def reject_profiles(modeladmin, request, queryset):
     default_reason = "Incomplete profile information"
-    for profile in queryset:
+    for profile in queryset.select_related("user"):
         profile.status = "REJECTED"
         profile.reviewed_at = timezone.now()
         profile.rejection_reason = default_reason
@@ -47,9 +85,12 @@ reject_profiles.short_description = "Reject selected profiles"
 # Profile Admin
 # -------------------------
 @admin.register(Profile)
-class ProfileAdmin(admin.ModelAdmin):
+class ProfileAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ("user", "status", "submitted_at", "reviewed_at", "rejection_reason")
     list_filter = ("status",)
+    list_select_related = ("user",)
+    autocomplete_fields = ("user",)
+    date_hierarchy = "submitted_at"
     search_fields = ("user__username", "user__email")
     fields = (
         "user",
@@ -65,11 +106,19 @@ class ProfileAdmin(admin.ModelAdmin):
     readonly_fields = ("submitted_at", "reviewed_at")
     actions = [approve_profiles, reject_profiles]
 
+    def get_search_results(self, request, queryset, search_term):
+        # Username, bio, location and intent come from the FTS index
+        # instead of LIKE '%...%' scans; email keeps an exact lookup.
+        if not search_term:
+            return queryset, False
+        matches = filter_by_search(queryset, search_term) | queryset.filter(user__email__iexact=search_term)
+        return matches, False
+
 # -------------------------
 # User Admin
 # -------------------------
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(FastChangeListMixin, BaseUserAdmin):
     list_display = ("username", "email", "is_staff", "is_active")
     search_fields = ("username", "email")
 
@@ -77,21 +126,58 @@ class UserAdmin(BaseUserAdmin):
 # Other Models
 # -------------------------
 @admin.register(ProfileImage)
-class ProfileImageAdmin(admin.ModelAdmin):
+class ProfileImageAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ("id", "profile", "uploaded_at")
+    # Profile.__str__ shows the username.
+    list_select_related = ("profile__user",)
+    raw_id_fields = ("profile",)
+    date_hierarchy = "uploaded_at"
 
 @admin.register(VerificationVideo)
-class VerificationVideoAdmin(admin.ModelAdmin):
+class VerificationVideoAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ("id", "profile", "uploaded_at")
+    list_select_related = ("profile__user",)
+    raw_id_fields = ("profile",)
 
 @admin.register(Like)
-class LikeAdmin(admin.ModelAdmin):
+class LikeAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ("from_user", "to_user", "created_at")
+    list_select_related = ("from_user", "to_user")
+    autocomplete_fields = ("from_user", "to_user")
+    date_hierarchy = "created_at"
 
 @admin.register(Match)
-class MatchAdmin(admin.ModelAdmin):
+class MatchAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ("user1", "user2", "created_at")
+    list_select_related = ("user1", "user2")
+    autocomplete_fields = ("user1", "user2")
+    date_hierarchy = "created_at"
+
+@admin.register(Block)
+class BlockAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ("blocker", "blocked", "created_at")
+    list_select_related = ("blocker", "blocked")
+    raw_id_fields = ("blocker", "blocked")
+
+@admin.register(Report)
+class ReportAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ("reported", "reporter", "reason", "resolved", "created_at")
+    list_filter = ("resolved", "reason")
+    list_select_related = ("reporter", "reported")
+    raw_id_fields = ("reporter", "reported")
 
 @admin.register(RejectionReason)
-class RejectionReasonAdmin(admin.ModelAdmin):
+class RejectionReasonAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ("profile", "reason")
+    list_select_related = ("profile__user",)
+    raw_id_fields = ("profile",)
+
+
+@admin.register(AccountDeletion)
+class AccountDeletionAdmin(admin.ModelAdmin):
+    list_display = ("username", "user_id", "status", "step", "rows_deleted", "requested_at", "finished_at")
+    list_filter = ("status",)
+    readonly_fields = (
+        "user_id", "username", "status", "step", "rows_deleted", "error",
+        "requested_at", "updated_at", "finished_at",
+    )
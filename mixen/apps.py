@@ -14,3 +14,4 @@ class MisenServerConfig(AppConfig):
 
     def ready(self):
         import mixen.models   # ensures signals load
+        import mixen.signals
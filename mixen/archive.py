@@ -0,0 +1,168 @@
+import json
+import mmap
+import os
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+
+
+# ----------------------------
+# COLD MESSAGE ARCHIVE
+# ----------------------------
+#
+# Each match gets two append-only files under MESSAGE_ARCHIVE_ROOT:
+#
+#   <match_id>.seg  zlib-compressed blocks of JSON lines, oldest first
+#   <match_id>.idx  one fixed-size record per block:
+#                   first_ts, last_ts (epoch microseconds), offset, length, count
+#
+# A block is only visible once its index record is written, so a crash
+# mid-append leaves unreferenced bytes at the end of the segment, never a
+# half-read block.
+
+INDEX_RECORD = struct.Struct("<qqQII")
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+# Integer arithmetic only: a float loses microseconds on current dates.
+def _to_micros(value):
+    return (value - EPOCH) // MICROSECOND
+
+
+def _from_micros(value):
+    return EPOCH + value * MICROSECOND
+
+
+def _paths(match_id):
+    root = Path(settings.MESSAGE_ARCHIVE_ROOT)
+    return root / f"{match_id}.seg", root / f"{match_id}.idx"
+
+
+def read_index(match_id):
+    """
+    Returns the block records of a match as (first_ts, last_ts, offset, length, count).
+    """
+    _, idx_path = _paths(match_id)
+    try:
+        data = idx_path.read_bytes()
+    except FileNotFoundError:
+        return []
+    usable = len(data) - len(data) % INDEX_RECORD.size
+    return list(INDEX_RECORD.iter_unpack(data[:usable]))
+
+
+def archived_until(match_id):
+    """
+    Timestamp of the newest archived message of a match, or None.
+    """
+    index = read_index(match_id)
+    return _from_micros(index[-1][1]) if index else None
+
+
+def archived_tail(match_id):
+    """
+    Ids in the newest block and the (timestamp, id) of its last message,
+    or (set(), None) for an empty archive. Rows up to that position are
+    already in a segment, even if an interrupted run left them in the table.
+    """
+    index = read_index(match_id)
+    if not index:
+        return set(), None
+    seg_path, _ = _paths(match_id)
+    _, _, offset, length, _ = index[-1]
+    with open(seg_path, "rb") as seg:
+        seg.seek(offset)
+        rows = list(_decode_block(seg.read(length), 0, length))
+    last = rows[-1]
+    return {row["id"] for row in rows}, (last["timestamp"], last["id"])
+
+
+def append_block(match_id, messages):
+    """
+    Appends messages (ordered oldest first, all newer than anything already
+    archived for the match) as one compressed block.
+    """
+    if not messages:
+        return
+    seg_path, idx_path = _paths(match_id)
+    seg_path.parent.mkdir(parents=True, exist_ok=True)
+
+    lines = [
+        json.dumps(
+            {"id": m.id, "sender_id": m.sender_id, "text": m.text, "ts": _to_micros(m.timestamp)},
+            separators=(",", ":"),
+        )
+        for m in messages
+    ]
+    block = zlib.compress("\n".join(lines).encode(), 6)
+
+    with open(seg_path, "ab") as seg:
+        offset = seg.tell()
+        seg.write(block)
+        seg.flush()
+        os.fsync(seg.fileno())
+
+    record = INDEX_RECORD.pack(
+        _to_micros(messages[0].timestamp),
+        _to_micros(messages[-1].timestamp),
+        offset,
+        len(block),
+        len(messages),
+    )
+    with open(idx_path, "ab") as idx:
+        idx.write(record)
+        idx.flush()
+        os.fsync(idx.fileno())
+
+
+def _decode_block(view, offset, length):
+    for line in zlib.decompress(view[offset:offset + length]).decode().split("\n"):
+        item = json.loads(line)
+        yield {
+            "id": item["id"],
+            "sender_id": item["sender_id"],
+            "text": item["text"],
+            "timestamp": _from_micros(item["ts"]),
+        }
+
+
+def read_archived(match_id, before=None, before_id=None, limit=50):
+    """
+    Returns up to `limit` archived messages older than `before`, oldest
+    first. With `before_id` the bound is the (timestamp, id) position, so
+    messages sharing the boundary timestamp are not skipped. Only the
+    blocks overlapping the requested range are decompressed.
+    """
+    index = read_index(match_id)
+    if not index or limit <= 0:
+        return []
+    seg_path, _ = _paths(match_id)
+    before_us = _to_micros(before) if before is not None else None
+
+    def older(row):
+        if before is None:
+            return True
+        if before_id is None:
+            return row["timestamp"] < before
+        return (row["timestamp"], row["id"]) < (before, before_id)
+
+    collected = []
+    with open(seg_path, "rb") as seg, mmap.mmap(seg.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        for first_ts, last_ts, offset, length, count in reversed(index):
+            if before_us is not None and (first_ts > before_us or (first_ts == before_us and before_id is None)):
+                continue
+            rows = [r for r in _decode_block(view, offset, length) if older(r)]
+            collected = rows + collected
+            if len(collected) >= limit:
+                break
+    return collected[-limit:]
+
+
+def delete_archive(match_id):
+    for path in _paths(match_id):
+        path.unlink(missing_ok=True)
@@ -0,0 +1,206 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Q
+from django.http import JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .models import User, Profile, Match, record_like, send_message
+from .caching import response_cache
+from .queries import (
+    SORT_DEFAULT, SORT_ACTIVE, swipe_page, parse_page, parse_sort, swipe_card, user_matches, match_card,
+    visible_users,
+)
+from .routers import routing_scope, enable_replica_reads, finish_routing
+from .utils import spend_coins
+from .versions import async_conditional_get
+
+
+# ---------------------------
+# ASYNC BASE VIEW (ASGI)
+# ---------------------------
+class AsyncJWTView(View):
+    """
+    Async counterpart of the JWT-protected APIViews. Reads use the async
+    ORM; multi-statement writes run as one sync_to_async call because
+    Django's async ORM cannot open transactions.
+    """
+    replica_reads = False
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await self.authenticate(request)
+        if user is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+        request.user = user
+
+        with routing_scope() as state:
+            self.routing_state = state
+            state.user_id = user.pk
+            if self.replica_reads and request.method in ("GET", "HEAD", "OPTIONS"):
+                enable_replica_reads(state, request)
+            try:
+                response = await super().dispatch(request, *args, **kwargs)
+            except ObjectDoesNotExist:
+                # A row the primary has is not on the replica yet.
+                if not state.replica:
+                    raise
+                state.replica, state.primary_only = False, True
+                response = await super().dispatch(request, *args, **kwargs)
+        finish_routing(state, response)
+        return response
+
+    async def authenticate(self, request):
+        auth = JWTAuthentication()
+        header = auth.get_header(request)
+        raw_token = auth.get_raw_token(header) if header else None
+        if raw_token is None:
+            return None
+        try:
+            token = auth.get_validated_token(raw_token)
+        except (InvalidToken, TokenError):
+            return None
+        user = await User.objects.filter(pk=token[jwt_settings.USER_ID_CLAIM]).afirst()
+        if user is None or not user.is_active:
+            return None
+        return user
+
+    def payload(self, request):
+        if request.content_type == "application/json":
+            try:
+                return json.loads(request.body or b"{}")
+            except ValueError:
+                return {}
+        return request.POST
+
+
+# ---------------------------
+# PROFILE STATUS
+# ---------------------------
+class AsyncProfileStatusView(AsyncJWTView):
+    replica_reads = True
+
+    @async_conditional_get("profile")
+    async def get(self, request):
+        # Cached like ProfileStatusView: primary reads only.
+        cacheable = not self.routing_state.replica
+        data = await response_cache.aget("status", request) if cacheable else None
+        if data is None:
+            profile = await Profile.objects.aget(user=request.user)
+            data = {
+                "status": profile.status,
+                "rejection_reason": profile.rejection_reason,
+                "coins": profile.coins
+            }
+            if cacheable:
+                await response_cache.aset("status", request, data)
+        return JsonResponse(data)
+
+
+# ---------------------------
+# SWIPE USERS
+# ---------------------------
+class AsyncSwipeUsersView(AsyncJWTView):
+    replica_reads = True
+
+    @async_conditional_get(
+        "deck", "likes", "matches",
+        extra_scopes=lambda request: ("presence",) if parse_sort(request.GET.get("sort")) == SORT_ACTIVE else (),
+    )
+    async def get(self, request):
+        page = parse_page(request.GET.get("page"))
+        if page is None:
+            return JsonResponse({"error": "page must be a positive number"}, status=400)
+        sort = parse_sort(request.GET.get("sort"))
+        if sort is None:
+            return JsonResponse({"error": "sort must be one of: default, active"}, status=400)
+        # Same caching rule as SwipeUsersView.
+        cacheable = page == 1 and sort == SORT_DEFAULT and not self.routing_state.replica
+        data = await response_cache.aget("swipe", request) if cacheable else None
+        if data is None:
+            data = [swipe_card(u) async for u in swipe_page(request.user, page, sort)]
+            if cacheable:
+                await response_cache.aset("swipe", request, data)
+        return JsonResponse(data, safe=False)
+
+
+# ---------------------------
+# LIKE A USER
+# ---------------------------
+class AsyncLikeUserView(AsyncJWTView):
+    async def post(self, request):
+        from_user = request.user
+        to_user_id = self.payload(request).get("to_user_id")
+        if not to_user_id:
+            return JsonResponse({"error": "to_user_id is required"}, status=400)
+        to_user = await visible_users(request.user).filter(id=to_user_id).afirst()
+        if to_user is None:
+            return JsonResponse({"error": "User not found"}, status=404)
+        if from_user == to_user:
+            return JsonResponse({"error": "You cannot like yourself"}, status=400)
+        if await from_user.likes_sent.filter(to_user=to_user).aexists():
+            return JsonResponse({"error": "You already liked this user"}, status=400)
+
+        if await sync_to_async(record_like)(from_user, to_user):
+            return JsonResponse({"success": "It's a match! 🎉"}, status=201)
+
+        return JsonResponse({"success": "User liked"}, status=201)
+
+
+# ---------------------------
+# VIEW MATCHES
+# ---------------------------
+class AsyncMatchesListView(AsyncJWTView):
+    replica_reads = True
+
+    @async_conditional_get("matches", "presence")
+    async def get(self, request):
+        user = request.user
+        sort = parse_sort(request.GET.get("sort"))
+        if sort is None:
+            return JsonResponse({"error": "sort must be one of: default, active"}, status=400)
+        all_matches = [match_card(m, user) async for m in user_matches(user, sort)]
+        return JsonResponse(all_matches, safe=False)
+
+
+# ---------------------------
+# SEND MESSAGE (COSTS 1 COIN)
+# ---------------------------
+class AsyncSendMessageView(AsyncJWTView):
+    async def post(self, request):
+        data = self.payload(request)
+        to_user_id = data.get("to_user")
+        text = data.get("text")
+        sender = request.user
+
+        if not to_user_id or not text:
+            return JsonResponse({"error": "to_user and text required"}, status=400)
+
+        receiver = await visible_users(request.user).filter(id=to_user_id).afirst()
+        if receiver is None:
+            return JsonResponse({"error": "User not found"}, status=404)
+
+        if not await sync_to_async(spend_coins)(sender, 1):
+            return JsonResponse({"error": "Not enough coins. Please buy more."}, status=400)
+
+        match = await Match.objects.filter(
+            Q(user1=sender, user2=receiver) | Q(user1=receiver, user2=sender)
+        ).afirst()
+
+        if not match:
+            return JsonResponse({"error": "You are not matched with this user"}, status=403)
+
+        await sync_to_async(send_message)(match, sender, text)
+
+        return JsonResponse({
+            "success": "Message sent",
+            "remaining_coins": sender.profile.coins
+        })
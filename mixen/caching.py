@@ -0,0 +1,94 @@
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .versions import aget_versions, get_versions
+
+
+# ----------------------------
+# PER-USER RESPONSE CACHE
+# ----------------------------
+
+class ResponseCache:
+    """
+    Bounded cache of per-user response payloads, keyed by view name and
+    the change versions (see versions.py) of the rows behind the view.
+    A write moves a version, so older entries are simply never read again
+    in any process and expire after the backend's TIMEOUT; nothing has to
+    be invalidated from inside the writing transaction.
+    """
+
+    # Change-version scopes each cached view depends on.
+    scopes = {
+        "status": ("profile",),
+        # Swipe pages also show other users' cards, which change for
+        # everyone at once when the global deck version moves.
+        "swipe": ("deck", "likes", "matches"),
+    }
+
+    def __init__(self, alias=None):
+        self.alias = alias
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        return caches[self.alias or settings.RESPONSE_CACHE_ALIAS]
+
+    def _known_versions(self, view, request):
+        # conditional_get() has usually read these versions for the ETag.
+        known = getattr(request, "change_versions", {})
+        scopes = self.scopes[view]
+        if all(scope in known for scope in scopes):
+            return [known[scope] for scope in scopes]
+        return None
+
+    def _key(self, view, request, versions):
+        return ":".join([view, str(request.user.pk), *versions])
+
+    def _sync_key(self, view, request):
+        versions = self._known_versions(view, request) or get_versions(self.scopes[view], request.user.pk)
+        return self._key(view, request, versions)
+
+    async def _async_key(self, view, request):
+        versions = self._known_versions(view, request) or await aget_versions(self.scopes[view], request.user.pk)
+        return self._key(view, request, versions)
+
+    def _count(self, view, outcome):
+        with self._lock:
+            self._counts[(view, outcome)] += 1
+
+    def get(self, view, request):
+        data = self.backend.get(self._sync_key(view, request))
+        self._count(view, "hit" if data is not None else "miss")
+        return data
+
+    def set(self, view, request, data):
+        self.backend.set(self._sync_key(view, request), data)
+
+    async def aget(self, view, request):
+        data = await self.backend.aget(await self._async_key(view, request))
+        self._count(view, "hit" if data is not None else "miss")
+        return data
+
+    async def aset(self, view, request, data):
+        await self.backend.aset(await self._async_key(view, request), data)
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        views = sorted({view for view, _ in counts})
+        report = {}
+        for view in views:
+            hits, misses = counts.get((view, "hit"), 0), counts.get((view, "miss"), 0)
+            report[view] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+            }
+        return report
+
+
+response_cache = ResponseCache()
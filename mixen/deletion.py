@@ -0,0 +1,136 @@
+import time
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import archive
+from .models import (
+    User, ProfileImage, VerificationVideo, RejectionReason, Like, Match,
+    Message, MatchReadState, Block, AccountDeletion, DeletionStatus, clear_unread,
+)
+from .versions import bump, bump_global
+
+
+# ----------------------------
+# ACCOUNT DELETION
+# ----------------------------
+# Deleting a User in one go cascades through every like, match and message
+# in a single transaction. Instead the account is deactivated at once
+# (hidden from discovery, JWTs rejected) and its rows are removed later in
+# small transactions by `manage.py process_account_deletions`.
+
+def _partners(user_id, matches):
+    return [other for pair in matches.values_list("user1_id", "user2_id") for other in pair if other != user_id]
+
+
+def request_account_deletion(user):
+    matches = _user_matches(user.pk)
+    with transaction.atomic():
+        user.is_active = False
+        user.save(update_fields=["is_active"])
+        job = AccountDeletion.objects.create(user_id=user.pk, username=user.username)
+        # Partners' unread badges stop counting these chats straight away,
+        # not when the batch job reaches them.
+        clear_unread(MatchReadState.objects.filter(match__in=matches).exclude(user=user))
+
+    # The account disappears from other users' decks, likes, matches and
+    # unread counts.
+    bump_global("deck")
+    partners = _partners(user.pk, matches)
+    bump("matches", *partners)
+    bump("messages", *partners)
+    bump("likes", *Like.objects.filter(from_user=user).values_list("to_user_id", flat=True))
+    return job
+
+
+def _delete_chunk(queryset, chunk_size):
+    ids = list(queryset.values_list("id", flat=True)[:chunk_size])
+    if not ids:
+        return 0
+    with transaction.atomic(using=queryset.db):
+        queryset.model.objects.using(queryset.db).filter(id__in=ids).delete()
+    return len(ids)
+
+
+def _user_matches(user_id):
+    return Match.objects.filter(Q(user1_id=user_id) | Q(user2_id=user_id))
+
+
+def _delete_messages(job, chunk_size, pause):
+    for match_id in list(_user_matches(job.user_id).values_list("id", flat=True)):
+        while True:
+            deleted = _delete_chunk(Message.objects.for_match(match_id), chunk_size)
+            if not deleted:
+                break
+            yield deleted
+            time.sleep(pause)
+        archive.delete_archive(match_id)
+
+
+def _delete_matches(job, chunk_size, pause):
+    while True:
+        match_ids = list(_user_matches(job.user_id).values_list("id", flat=True)[:chunk_size])
+        if not match_ids:
+            return
+        partners = _partners(job.user_id, Match.objects.filter(id__in=match_ids))
+        with transaction.atomic():
+            # Normally already cleared by request_account_deletion().
+            clear_unread(MatchReadState.objects.filter(match_id__in=match_ids).exclude(user_id=job.user_id))
+            Match.objects.filter(id__in=match_ids).delete()
+        bump("messages", *partners)
+        yield len(match_ids)
+        time.sleep(pause)
+
+
+def _chunked(queryset_for):
+    def step(job, chunk_size, pause):
+        while True:
+            deleted = _delete_chunk(queryset_for(job.user_id), chunk_size)
+            if not deleted:
+                return
+            yield deleted
+            time.sleep(pause)
+    return step
+
+
+# Ordered so every step leaves the database consistent if the job stops.
+STEPS = [
+    ("messages", _delete_messages),
+    ("matches", _delete_matches),
+    ("likes_sent", _chunked(lambda uid: Like.objects.filter(from_user_id=uid))),
+    ("likes_received", _chunked(lambda uid: Like.objects.filter(to_user_id=uid))),
+    ("blocks", _chunked(lambda uid: Block.objects.filter(Q(blocker_id=uid) | Q(blocked_id=uid)))),
+    ("images", _chunked(lambda uid: ProfileImage.objects.filter(profile__user_id=uid))),
+    ("video", _chunked(lambda uid: VerificationVideo.objects.filter(profile__user_id=uid))),
+    ("rejection_reasons", _chunked(lambda uid: RejectionReason.objects.filter(profile__user_id=uid))),
+    ("user", _chunked(lambda uid: User.objects.filter(id=uid))),
+]
+
+
+def process_deletion(job, chunk_size=500, pause=0.0):
+    """
+    Runs (or resumes) a deletion job. Every step re-queries what is left,
+    so a job interrupted at any point can simply be run again.
+    """
+    job.status = DeletionStatus.RUNNING
+    job.error = ""
+    job.save(update_fields=["status", "error", "updated_at"])
+    try:
+        for name, step in STEPS:
+            job.step = name
+            job.save(update_fields=["step", "updated_at"])
+            for deleted in step(job, chunk_size, pause):
+                job.rows_deleted += deleted
+                job.save(update_fields=["rows_deleted", "updated_at"])
+    except Exception as exc:
+        job.status = DeletionStatus.FAILED
+        job.error = repr(exc)
+        job.save(update_fields=["status", "error", "updated_at"])
+        raise
+
+    job.status = DeletionStatus.DONE
+    job.step = ""
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "step", "finished_at", "updated_at"])
+    return job
@@ -0,0 +1,101 @@
+import csv
+import json
+from datetime import datetime
+
+from django.conf import settings
+
+from .models import Like, Match, Message, ExportCursor
+from .routers import replica_configured
+
+
+# ----------------------------
+# STREAMING ANALYTICS EXPORT
+# ----------------------------
+
+EXPORT_STREAMS = {
+    "likes": (Like, ("id", "from_user_id", "to_user_id", "created_at"), "created_at"),
+    "matches": (Match, ("id", "user1_id", "user2_id", "created_at"), "created_at"),
+    "messages": (Message, ("id", "match_id", "sender_id", "text", "timestamp"), "timestamp"),
+}
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+
+# Message ids are unique across shards and kept when rows move, so one
+# mark covers every shard and a rebalance does not export rows again.
+SHARED_CURSOR = "shards"
+
+
+def _databases(stream):
+    if stream == "messages":
+        return list(settings.MESSAGE_SHARDS)
+    # Keep analytics scans off the primary when a replica exists.
+    return [settings.REPLICA_DATABASE if replica_configured() else "default"]
+
+
+class _Echo:
+    """File-like object for csv.writer that hands each line back."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(stream, since=None, until=None, cursor=None, chunk_size=2000):
+    """
+    Yields row tuples for a stream with keyset pagination on the primary
+    key, so memory stays constant however large the table is. With a
+    `cursor` name only rows past its stored high-water mark are returned,
+    and the mark is advanced once every row has been yielded.
+    """
+    model, fields, time_field = EXPORT_STREAMS[stream]
+    shared = stream == "messages"
+    marks = {}
+
+    for database in _databases(stream):
+        last_id = 0
+        if cursor:
+            key = SHARED_CURSOR if shared else database
+            mark = ExportCursor.objects.filter(name=cursor, stream=stream, database=key).first()
+            last_id = mark.last_id if mark else 0
+
+        queryset = model.objects.using(database)
+        if since:
+            queryset = queryset.filter(**{f"{time_field}__gte": since})
+        if until:
+            queryset = queryset.filter(**{f"{time_field}__lt": until})
+
+        while True:
+            chunk = list(queryset.filter(id__gt=last_id).order_by("id").values_list(*fields)[:chunk_size])
+            if not chunk:
+                break
+            yield from chunk
+            last_id = chunk[-1][0]
+        marks[database] = last_id
+
+    if shared:
+        marks = {SHARED_CURSOR: max(marks.values(), default=0)}
+    if cursor:
+        for database, last_id in marks.items():
+            ExportCursor.objects.update_or_create(
+                name=cursor, stream=stream, database=database,
+                defaults={"last_id": last_id},
+            )
+
+
+def render_rows(stream, rows, fmt):
+    """
+    Turns row tuples into CSV (with a header line) or JSON Lines strings.
+    """
+    _, fields, _ = EXPORT_STREAMS[stream]
+
+    def values(row):
+        return [v.isoformat() if isinstance(v, datetime) else v for v in row]
+
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow(values(row))
+    else:
+        for row in rows:
+            yield json.dumps(dict(zip(fields, values(row)))) + "\n"
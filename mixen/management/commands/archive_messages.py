@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from mixen import archive
+from mixen.models import Message
+
+
+class Command(BaseCommand):
+    help = "Move messages older than MESSAGE_ARCHIVE_AFTER_DAYS into per-match archive segments."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.MESSAGE_ARCHIVE_AFTER_DAYS)
+        parser.add_argument("--block-size", type=int, default=1000, help="Messages per compressed block.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        archived = 0
+        for alias in settings.MESSAGE_SHARDS:
+            old = Message.objects.using(alias).filter(timestamp__lt=cutoff)
+            match_ids = list(old.order_by("match_id").values_list("match_id", flat=True).distinct())
+            for match_id in match_ids:
+                archived += self.archive_match(alias, match_id, cutoff, options["block_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} messages older than {cutoff:%Y-%m-%d}"))
+
+    def archive_match(self, alias, match_id, cutoff, block_size):
+        archived = 0
+        messages = Message.objects.using(alias).filter(match_id=match_id, timestamp__lt=cutoff)
+        # Rows up to the archive's last (timestamp, id) were written to a
+        # segment by an earlier run that stopped before deleting them.
+        tail_ids, tail = archive.archived_tail(match_id)
+        position = None
+        while True:
+            page = messages
+            if position is not None:
+                ts, last_id = position
+                page = page.filter(Q(timestamp__gt=ts) | Q(timestamp=ts, id__gt=last_id))
+            chunk = list(page.order_by("timestamp", "id")[:block_size])
+            if not chunk:
+                return archived
+            position = (chunk[-1].timestamp, chunk[-1].id)
+
+            fresh = [m for m in chunk if tail is None or (m.timestamp, m.id) > tail]
+            done = [m.id for m in chunk if m.id in tail_ids]
+            # Anything else is older than the archive but was never written
+            # to it (e.g. moved in by a shard rebalance); it stays in the
+            # table, where history reads still find it.
+            archive.append_block(match_id, fresh)
+            if fresh:
+                tail_ids, tail = {m.id for m in fresh}, (fresh[-1].timestamp, fresh[-1].id)
+
+            with transaction.atomic(using=alias):
+                Message.objects.using(alias).filter(id__in=done + [m.id for m in fresh]).delete()
+            archived += len(fresh)
@@ -0,0 +1,85 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from django.test.utils import setup_databases, teardown_databases
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+ENDPOINTS = ("status", "swipe", "matches")
+
+
+def summarize(label, latencies, elapsed):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    return (
+        f"{label:<28} {len(latencies) / elapsed:8.0f} req/s  "
+        f"p50 {statistics.median(latencies) * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms"
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the sync (WSGI) and async (ASGI) views at equal worker counts "
+        "against a throwaway test database, in process (no network)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1, help="WSGI threads / ASGI event loops.")
+        parser.add_argument("--concurrency", type=int, default=32, help="In-flight requests per ASGI worker.")
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--users", type=int, default=200)
+
+    def handle(self, *args, **options):
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            token = self.seed(options["users"])
+            for endpoint in ENDPOINTS:
+                self.stdout.write(self.run_wsgi(endpoint, token, options))
+                self.stdout.write(asyncio.run(self.run_asgi(endpoint, token, options)))
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def seed(self, count):
+        from mixen.models import User, Profile, ProfileImage, Match, VerificationStatus
+
+        users = [User.objects.create_user(f"bench{i}", f"bench{i}@example.com", "pw") for i in range(count)]
+        Profile.objects.update(status=VerificationStatus.APPROVED, bio="bench", age=30)
+        ProfileImage.objects.bulk_create([
+            ProfileImage(profile=u.profile, image_url=f"https://example.com/{u.id}.jpg") for u in users
+        ])
+        Match.objects.bulk_create([Match(user1=users[0], user2=u) for u in users[1:count // 4]])
+        return str(RefreshToken.for_user(users[0]).access_token)
+
+    def run_wsgi(self, endpoint, token, options):
+        path = f"/api/{endpoint}/"
+        headers = {"Authorization": f"Bearer {token}"}
+
+        def one(_):
+            start = time.perf_counter()
+            Client().get(path, headers=headers)
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options["workers"]) as pool:
+            latencies = list(pool.map(one, range(options["requests"])))
+        return summarize(f"wsgi  {path}", latencies, time.perf_counter() - start)
+
+    async def run_asgi(self, endpoint, token, options):
+        path = f"/api/async/{endpoint}/"
+        headers = {"Authorization": f"Bearer {token}"}
+        limit = asyncio.Semaphore(options["concurrency"] * options["workers"])
+        client = AsyncClient()
+
+        async def one():
+            async with limit:
+                start = time.perf_counter()
+                await client.get(path, headers=headers)
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(one() for _ in range(options["requests"])))
+        return summarize(f"asgi  {path}", latencies, time.perf_counter() - start)
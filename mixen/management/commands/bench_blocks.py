@@ -0,0 +1,128 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_databases, teardown_databases
+
+
+def timed(fn, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return statistics.median(latencies) * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the swipe, likes and matches queries with and without blocks "
+        "against a throwaway test database, and show the plans of the block anti-joins."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20000)
+        parser.add_argument("--blocks", type=int, default=2000, help="Blocks made by and against the viewer, each.")
+        parser.add_argument("--background-blocks", type=int, default=100000, help="Blocks between other users.")
+        parser.add_argument("--background-likes", type=int, default=200000, help="Likes between other users.")
+        parser.add_argument("--background-matches", type=int, default=50000, help="Matches between other users.")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--plans", action="store_true", help="Print EXPLAIN QUERY PLAN for each query.")
+
+    def handle(self, *args, **options):
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            viewer = self.seed(options)
+            self.report(viewer, options, "with blocks")
+            self.clear_viewer_blocks(viewer)
+            self.report(viewer, options, "without blocks")
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def seed(self, options):
+        from mixen.models import User, Profile, Like, Match, Block, VerificationStatus
+
+        count = options["users"]
+        User.objects.bulk_create(
+            [User(username=f"bench{i}", email=f"bench{i}@example.com", password="!") for i in range(count)],
+            batch_size=2000,
+        )
+        ids = list(User.objects.order_by("id").values_list("id", flat=True))
+        Profile.objects.bulk_create(
+            [Profile(user_id=uid, status=VerificationStatus.APPROVED, age=30, bio="bench") for uid in ids],
+            batch_size=2000,
+        )
+        viewer, others = ids[0], ids[1:]
+
+        # The viewer has liked, matched and been liked by slices of the
+        # user base, and half of each slice is also blocked.
+        quarter = len(others) // 4
+        Match.objects.bulk_create([Match(user1_id=viewer, user2_id=uid) for uid in others[:quarter]], batch_size=2000)
+        Like.objects.bulk_create([Like(from_user_id=uid, to_user_id=viewer) for uid in others[:2 * quarter]], batch_size=2000)
+
+        blocks = options["blocks"]
+        step = max(1, len(others) // (2 * blocks))
+        blocked = others[::step][:2 * blocks]
+        Block.objects.bulk_create(
+            [Block(blocker_id=viewer, blocked_id=uid) for uid in blocked[::2]]
+            + [Block(blocker_id=uid, blocked_id=viewer) for uid in blocked[1::2]],
+            batch_size=2000,
+        )
+        # The rest of the user base likes, matches and blocks each other, so
+        # the planner sees the viewer's rows as the small slice they are.
+        def pairs(total, stride):
+            return (
+                (others[i % len(others)], others[(i * stride + 1) % len(others)])
+                for i in range(total)
+            )
+
+        Like.objects.bulk_create(
+            [Like(from_user_id=a, to_user_id=b) for a, b in pairs(options["background_likes"], 3) if a != b],
+            batch_size=2000, ignore_conflicts=True,
+        )
+        Match.objects.bulk_create(
+            [Match(user1_id=a, user2_id=b) for a, b in pairs(options["background_matches"], 5) if a != b],
+            batch_size=2000, ignore_conflicts=True,
+        )
+        Block.objects.bulk_create(
+            [Block(blocker_id=a, blocked_id=b) for a, b in pairs(options["background_blocks"], 7) if a != b],
+            batch_size=2000, ignore_conflicts=True,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        self.stdout.write(
+            f"{count} users, {Block.objects.count()} blocks "
+            f"({Block.objects.filter(blocker_id=viewer).count()} by the viewer, "
+            f"{Block.objects.filter(blocked_id=viewer).count()} against), "
+            f"{Match.objects.count()} matches, {Like.objects.count()} likes"
+        )
+        return User.objects.get(id=viewer)
+
+    def clear_viewer_blocks(self, viewer):
+        from django.db.models import Q
+        from mixen.models import Block
+
+        Block.objects.filter(Q(blocker=viewer) | Q(blocked=viewer)).delete()
+
+    def report(self, viewer, options, label):
+        from mixen.queries import swipe_page, user_matches, likes_received
+
+        querysets = {
+            "swipe page": lambda: swipe_page(viewer),
+            "matches": lambda: user_matches(viewer),
+            "likes received": lambda: likes_received(viewer),
+        }
+        self.stdout.write(f"\n{label}:")
+        for name, make in querysets.items():
+            with CaptureQueriesContext(connection) as queries:
+                rows = len(list(make()))
+            ms = timed(lambda: list(make()), options["repeat"])
+            self.stdout.write(f"  {name:<16} {rows:6d} rows  {len(queries)} query  {ms:8.2f} ms")
+            if options["plans"]:
+                sql, params = make().query.sql_with_params()
+                with connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                    for row in cursor.fetchall():
+                        self.stdout.write(f"      {row[-1]}")
@@ -0,0 +1,53 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from mixen.renderers import ORJSONRenderer, MessagePackRenderer, msgpack, orjson
+
+
+def swipe_deck(cards):
+    return [
+        {
+            "id": i,
+            "username": f"user{i}",
+            "age": 20 + i % 30,
+            "bio": "Coffee, hiking and long walks on the beach. " * 3,
+            "profile_image": f"https://firebasestorage.googleapis.com/v0/b/mixen/o/{i}.jpg",
+        }
+        for i in range(cards)
+    ]
+
+
+def likes_page(cards):
+    now = timezone.now()
+    return {
+        "likes": [{"from_user": f"user{i}", "created_at": now} for i in range(cards)],
+        "remaining_coins": 25,
+    }
+
+
+class Command(BaseCommand):
+    help = "Measure renderer cost per 1,000 swipe cards and likes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cards", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        renderers = [("drf json", JSONRenderer())]
+        if orjson is not None:
+            renderers.append(("orjson", ORJSONRenderer()))
+        if msgpack is not None:
+            renderers.append(("msgpack", MessagePackRenderer()))
+
+        for label, payload in (("swipe", swipe_deck(options["cards"])), ("likes", likes_page(options["cards"]))):
+            for name, renderer in renderers:
+                media_type = renderer.media_type
+                seconds = timeit.timeit(lambda: renderer.render(payload, media_type), number=options["repeat"])
+                size = len(renderer.render(payload, media_type))
+                per_thousand_ms = seconds / options["repeat"] * 1000 * 1000 / options["cards"]
+                self.stdout.write(
+                    f"{label:<6} {name:<9} {per_thousand_ms:7.3f} ms / 1,000 cards  {size:>8} bytes"
+                )
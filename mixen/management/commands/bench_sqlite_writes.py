@@ -0,0 +1,99 @@
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+SCHEMA = """
+CREATE TABLE profile (id INTEGER PRIMARY KEY, coins INTEGER NOT NULL);
+CREATE TABLE message (id INTEGER PRIMARY KEY AUTOINCREMENT, sender_id INTEGER, text TEXT, ts REAL);
+CREATE TABLE "like" (id INTEGER PRIMARY KEY AUTOINCREMENT, from_id INTEGER, to_id INTEGER, ts REAL);
+"""
+
+
+def connect(path, profile):
+    if profile == "production":
+        conn = sqlite3.connect(path, timeout=20, isolation_level=None)
+        for pragma in settings.SQLITE_PRODUCTION_PRAGMAS:
+            conn.execute(pragma)
+    else:
+        # Django's defaults: Python's 5s timeout, rollback journal, deferred
+        # transactions.
+        conn = sqlite3.connect(path, isolation_level=None)
+    return conn
+
+
+def worker(args):
+    """
+    Runs the send-message pattern (read coins, spend one, insert message)
+    plus a like insert, mirroring what SendMessageView and LikeUserView do.
+    """
+    path, profile, worker_id, operations = args
+    conn = connect(path, profile)
+    begin = "BEGIN IMMEDIATE" if profile == "production" else "BEGIN"
+    ok = locked = 0
+    for i in range(operations):
+        try:
+            conn.execute(begin)
+            (coins,) = conn.execute(
+                "SELECT coins FROM profile WHERE id = ?", (worker_id,)
+            ).fetchone()
+            conn.execute("UPDATE profile SET coins = ? WHERE id = ?", (coins - 1, worker_id))
+            conn.execute(
+                "INSERT INTO message (sender_id, text, ts) VALUES (?, ?, ?)",
+                (worker_id, "hello", time.time()),
+            )
+            conn.execute(
+                'INSERT INTO "like" (from_id, to_id, ts) VALUES (?, ?, ?)',
+                (worker_id, i, time.time()),
+            )
+            conn.execute("COMMIT")
+            ok += 1
+        except sqlite3.OperationalError as exc:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            if "locked" not in str(exc) and "busy" not in str(exc):
+                raise
+            locked += 1
+    conn.close()
+    return ok, locked
+
+
+class Command(BaseCommand):
+    help = "Compare concurrent write throughput of the default and production SQLite profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--operations", type=int, default=500, help="Transactions per worker.")
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        operations = options["operations"]
+
+        for profile in ("development", "production"):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "bench.sqlite3")
+                conn = connect(path, profile)
+                conn.executescript(SCHEMA)
+                conn.executemany(
+                    "INSERT INTO profile (id, coins) VALUES (?, ?)",
+                    [(w, operations) for w in range(workers)],
+                )
+                conn.close()
+
+                jobs = [(path, profile, w, operations) for w in range(workers)]
+                start = time.perf_counter()
+                with multiprocessing.Pool(workers) as pool:
+                    results = pool.map(worker, jobs)
+                elapsed = time.perf_counter() - start
+
+            ok = sum(r[0] for r in results)
+            locked = sum(r[1] for r in results)
+            self.stdout.write(
+                f"{profile:<12} {ok:>7} committed  {locked:>6} locked  "
+                f"{elapsed:7.2f}s  {ok / elapsed:9.0f} tx/s"
+            )
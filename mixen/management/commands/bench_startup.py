@@ -0,0 +1,177 @@
+import gc
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# The pools run in fresh interpreters so the cold mode really starts from
+# nothing; these snippets are their entry points.
+SEED = "from mixen.management.commands.bench_startup import seed; seed()"
+POOL = "from mixen.management.commands.bench_startup import run_pool; run_pool(*__import__('sys').argv[1:])"
+
+PATH = "/api/swipe/"
+
+
+def seed():
+    import django
+    django.setup()
+    from django.core.management import call_command
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from mixen.models import User, Profile, ProfileImage, VerificationStatus
+
+    call_command("migrate", verbosity=0)
+    users = [User.objects.create_user(f"bench{i}", f"bench{i}@example.com", "pw") for i in range(60)]
+    Profile.objects.update(status=VerificationStatus.APPROVED, bio="bench", age=30)
+    ProfileImage.objects.bulk_create([
+        ProfileImage(profile=u.profile, image_url=f"https://example.com/{u.id}.jpg") for u in users
+    ])
+    print(RefreshToken.for_user(users[0]).access_token)
+
+
+def _request(application, token):
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": PATH,
+        "QUERY_STRING": "",
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "8000",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": "localhost",
+        "HTTP_AUTHORIZATION": f"Bearer {token}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": False,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    status = []
+    response = application(environ, lambda s, headers, exc_info=None: status.append(s))
+    try:
+        b"".join(response)
+    finally:
+        response.close()
+    return status[0]
+
+
+def _memory_kb():
+    """
+    Resident and private (unshared) memory of this process, from
+    /proc/self/smaps_rollup (Linux only).
+    """
+    fields = {}
+    with open("/proc/self/smaps_rollup") as rollup:
+        for line in rollup:
+            key, _, rest = line.partition(":")
+            if rest.strip().endswith("kB"):
+                fields[key] = int(rest.split()[0])
+    return fields["Rss"], fields["Private_Clean"] + fields["Private_Dirty"]
+
+
+def run_pool(mode, workers, requests, token):
+    """
+    Forks `workers` processes like a pre-forking server and reports, per
+    worker, time from fork to the first response and private memory after
+    `requests` requests and a full GC. "warm" loads and warms the app in
+    the parent first (as gunicorn.conf.py does); "cold" leaves every
+    worker to import it.
+    """
+    from mixen_backend import warmup
+
+    application, master = None, []
+    if mode == "warm":
+        start = time.perf_counter()
+        application = warmup.load_application()
+        master = [("import app", time.perf_counter() - start)] + warmup.warm_up()
+
+    children = []
+    for _ in range(int(workers)):
+        read_fd, write_fd = os.pipe()
+        forked = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            try:
+                if application is None:
+                    application = warmup.load_application()
+                else:
+                    warmup.warm_worker()
+                status = _request(application, token)
+                first = time.perf_counter() - forked
+                for _ in range(int(requests) - 1):
+                    _request(application, token)
+                gc.collect()
+                rss, private = _memory_kb()
+                os.write(write_fd, json.dumps(
+                    {"status": status, "first_request": first, "rss_kb": rss, "private_kb": private}
+                ).encode())
+            finally:
+                os._exit(0)
+        os.close(write_fd)
+        children.append((pid, read_fd))
+
+    results = []
+    for pid, read_fd in children:
+        with os.fdopen(read_fd, "rb") as pipe:
+            results.append(json.loads(pipe.read() or b"{}"))
+        os.waitpid(pid, 0)
+    print(json.dumps({"master": master, "master_rss_kb": _memory_kb()[0], "workers": results}))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare cold workers with workers forked from a warmed, GC-frozen "
+        "master: time to first request and private memory per worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--requests", type=int, default=20, help="Requests per worker before measuring memory.")
+
+    def handle(self, *args, **options):
+        if not os.path.exists("/proc/self/smaps_rollup") or not hasattr(os, "fork"):
+            raise CommandError("This benchmark needs Linux (fork and /proc/self/smaps_rollup).")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {
+                **os.environ,
+                "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "mixen_backend.settings"),
+                "MIXEN_DB_PATH": os.path.join(tmp, "bench.sqlite3"),
+            }
+            token = self.python(SEED, env).strip().splitlines()[-1]
+            for mode in ("cold", "warm"):
+                report = json.loads(self.python(POOL, env, mode, options["workers"], options["requests"], token))
+                self.write_report(mode, report)
+
+    def python(self, code, env, *args):
+        result = subprocess.run(
+            [sys.executable, "-c", code, *map(str, args)],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr)
+        return result.stdout
+
+    def write_report(self, mode, report):
+        workers = report["workers"]
+        first = [w["first_request"] * 1000 for w in workers]
+        private = [w["private_kb"] / 1024 for w in workers]
+        self.stdout.write(f"{mode}:")
+        if report["master"]:
+            phases = ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in report["master"])
+            self.stdout.write(f"  master start-up   {phases}")
+        self.stdout.write(f"  master rss        {report['master_rss_kb'] / 1024:8.1f} MB")
+        self.stdout.write(
+            f"  first request     mean {statistics.mean(first):8.1f} ms  max {max(first):8.1f} ms  "
+            f"({', '.join(sorted({w['status'] for w in workers}))})"
+        )
+        self.stdout.write(f"  private memory    mean {statistics.mean(private):8.1f} MB per worker")
@@ -0,0 +1,45 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mixen.models import EventTopic
+from mixen.outbox import Consumer
+
+
+class Command(BaseCommand):
+    help = (
+        "Print outbox events past a consumer's stored offset as JSON Lines, "
+        "committing the offset after each batch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("consumer", help="Name the offset is stored under.")
+        parser.add_argument("--topic", action="append", choices=EventTopic.values, dest="topics")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--from-offset", type=int, help="Reset the consumer to this offset first.")
+        parser.add_argument("--follow", action="store_true", help="Keep polling after catching up.")
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds between polls with --follow.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+        consumer = Consumer(options["consumer"], topics=options["topics"], batch_size=options["batch_size"])
+        if options["from_offset"] is not None:
+            consumer.commit(options["from_offset"])
+
+        while True:
+            for batch in consumer.batches():
+                for event in batch:
+                    sys.stdout.write(json.dumps({
+                        "offset": event.id,
+                        "topic": event.topic,
+                        "key": event.key,
+                        "payload": event.payload,
+                        "created_at": event.created_at.isoformat(),
+                    }) + "\n")
+                sys.stdout.flush()
+            if not options["follow"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from mixen.exports import EXPORT_STREAMS, EXPORT_FORMATS, export_rows, render_rows
+
+
+class Command(BaseCommand):
+    help = "Stream likes, matches or messages to CSV or JSON Lines with constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("stream", choices=list(EXPORT_STREAMS))
+        parser.add_argument("--format", dest="fmt", choices=EXPORT_FORMATS, default="csv")
+        parser.add_argument("--since", help="ISO timestamp, inclusive.")
+        parser.add_argument("--until", help="ISO timestamp, exclusive.")
+        parser.add_argument("--cursor", help="Export only rows added since the last run with this name.")
+        parser.add_argument("--output", help="File to write (default: stdout).")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        bounds = {}
+        for key in ("since", "until"):
+            if options[key]:
+                bounds[key] = parse_datetime(options[key])
+                if bounds[key] is None:
+                    raise CommandError(f"--{key} must be an ISO timestamp")
+
+        rows = export_rows(
+            options["stream"],
+            cursor=options["cursor"],
+            chunk_size=options["chunk_size"],
+            **bounds,
+        )
+        out = open(options["output"], "w", newline="") if options["output"] else sys.stdout
+        try:
+            for chunk in render_rows(options["stream"], rows, options["fmt"]):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from mixen.deletion import process_deletion
+from mixen.models import AccountDeletion, DeletionStatus
+
+
+class Command(BaseCommand):
+    help = "Remove the data of deactivated accounts in small chunks (run from cron or a worker loop)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--pause", type=float, default=0.05,
+            help="Seconds to sleep between chunks so request writes get the lock.",
+        )
+        parser.add_argument("--limit", type=int, default=None, help="Process at most this many jobs.")
+
+    def handle(self, *args, **options):
+        jobs = AccountDeletion.objects.filter(
+            status__in=[DeletionStatus.PENDING, DeletionStatus.RUNNING, DeletionStatus.FAILED]
+        ).order_by("requested_at")
+        if options["limit"]:
+            jobs = jobs[:options["limit"]]
+
+        for job in list(jobs):
+            self.stdout.write(f"Deleting account {job.username} (id {job.user_id})...")
+            try:
+                process_deletion(job, chunk_size=options["chunk_size"], pause=options["pause"])
+            except Exception as exc:
+                self.stderr.write(self.style.ERROR(f"  failed at step {job.step}: {exc!r}"))
+                continue
+            self.stdout.write(self.style.SUCCESS(f"  done, {job.rows_deleted} rows removed"))
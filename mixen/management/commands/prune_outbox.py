@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from mixen.outbox import compact_events, consumer_offsets, outbox_stats, purge_events
+
+
+class Command(BaseCommand):
+    help = "Apply outbox retention and compact superseded profile status events."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.OUTBOX_RETENTION_DAYS, help="Retention window.")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        purged = purge_events(cutoff, options["chunk_size"])
+        compacted = compact_events(options["chunk_size"])
+        stats = outbox_stats()
+        self.stdout.write(
+            f"Purged {purged} events older than {options['days']} days, compacted {compacted}. "
+            f"Offsets {stats['first_offset']}..{stats['last_offset']}."
+        )
+        for name, offset in sorted(consumer_offsets().items()):
+            behind = (stats["last_offset"] or 0) - offset
+            self.stdout.write(f"  {name}: offset {offset} ({max(behind, 0)} behind)")
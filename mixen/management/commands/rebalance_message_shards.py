@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from mixen.models import Message
+from mixen.routers import shard_for_match
+
+
+class Command(BaseCommand):
+    help = (
+        "Move conversations to the message shard their match id hashes to. "
+        "Run after adding a database to MESSAGE_SHARDS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            action="append",
+            default=[],
+            help="Extra database alias to drain (e.g. a shard being retired). Repeatable.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        sources = list(settings.MESSAGE_SHARDS) + options["source"]
+        for alias in sources:
+            if alias not in settings.DATABASES:
+                raise CommandError(f"Unknown database alias: {alias}")
+
+        moved_matches = moved_messages = 0
+        for source in sources:
+            match_ids = (
+                Message.objects.using(source)
+                .order_by("match_id")
+                .values_list("match_id", flat=True)
+                .distinct()
+            )
+            for match_id in list(match_ids):
+                target = shard_for_match(match_id)
+                if target == source:
+                    continue
+                moved_matches += 1
+                if options["dry_run"]:
+                    self.stdout.write(f"match {match_id}: {source} -> {target}")
+                    continue
+                moved_messages += self.move(match_id, source, target, options["chunk_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Moved {moved_messages} messages in {moved_matches} conversations")
+        )
+
+    def move(self, match_id, source, target, chunk_size):
+        """
+        Copies a conversation chunk by chunk, deleting each chunk from the
+        source only after it is committed on the target. Message ids are
+        issued on the primary, so moved rows keep them.
+        """
+        moved = 0
+        while True:
+            chunk = list(
+                Message.objects.using(source)
+                .filter(match_id=match_id)
+                .order_by("timestamp", "id")[:chunk_size]
+            )
+            if not chunk:
+                return moved
+            with transaction.atomic(using=target):
+                Message.objects.using(target).bulk_create([
+                    Message(id=m.id, match_id=m.match_id, sender_id=m.sender_id, text=m.text, timestamp=m.timestamp)
+                    for m in chunk
+                ])
+            with transaction.atomic(using=source):
+                Message.objects.using(source).filter(id__in=[m.id for m in chunk]).delete()
+            moved += len(chunk)
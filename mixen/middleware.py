@@ -0,0 +1,42 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.utils.functional import SimpleLazyObject
+
+from .presence import presence
+
+
+class PresenceMiddleware:
+    """
+    Records authenticated API activity for "recently active" sorting. DRF
+    copies the JWT user onto the Django request, so it is visible here
+    once the view has run. Runs natively under both WSGI and ASGI, so the
+    async views are not adapted to a thread for it.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated and presence.record(user.pk):
+            presence.flush()
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        user = getattr(request, "user", None)
+        # Views that authenticated the request replaced the lazy session
+        # user with a real one; only the session lookup needs the database.
+        if isinstance(user, SimpleLazyObject):
+            user = await request.auser()
+        if user is not None and user.is_authenticated and presence.record(user.pk):
+            await sync_to_async(presence.flush)()
+        return response
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mixen', '0003_exportcursor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='last_active',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
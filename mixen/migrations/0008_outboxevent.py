@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:24
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mixen', '0007_block_report'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(choices=[('like.created', 'Like Created'), ('match.created', 'Match Created'), ('message.created', 'Message Created'), ('profile.status', 'Profile Status')], max_length=50)),
+                ('key', models.CharField(max_length=64)),
+                ('payload', models.JSONField()),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['topic', 'key', 'id'], name='mixen_outbo_topic_6133f4_idx')],
+            },
+        ),
+    ]
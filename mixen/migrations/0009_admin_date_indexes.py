@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mixen', '0008_outboxevent'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='like',
+            index=models.Index(fields=['created_at'], name='mixen_like_created_2820f3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['created_at'], name='mixen_match_created_2dc6fb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['submitted_at'], name='mixen_profi_submitt_a9a1cd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profileimage',
+            index=models.Index(fields=['uploaded_at'], name='mixen_profi_uploade_119d41_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mixen', '0009_admin_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=20)),
+                ('user_id', models.BigIntegerField()),
+                ('token', models.CharField(max_length=16)),
+            ],
+            options={
+                'unique_together': {('scope', 'user_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:07
+
+from django.conf import settings
+from django.db import DatabaseError, migrations, models
+
+
+def start_after_existing_ids(apps, schema_editor):
+    """
+    Issues (and drops) one id above the largest message id on any shard,
+    so the primary's sequence never repeats an id the shards already used.
+    """
+    if schema_editor.connection.alias != 'default':
+        return
+    Message = apps.get_model('mixen', 'Message')
+    MessageId = apps.get_model('mixen', 'MessageId')
+    highest = 0
+    for alias in settings.MESSAGE_SHARDS:
+        try:
+            highest = max(highest, Message.objects.using(alias).aggregate(top=models.Max('id'))['top'] or 0)
+        except DatabaseError:
+            # A shard that has not been migrated yet holds no messages.
+            pass
+    if highest:
+        MessageId.objects.using('default').create(id=highest)
+        MessageId.objects.using('default').filter(id=highest).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mixen', '0011_primarypin'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageId',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='id',
+            field=models.BigIntegerField(editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.RunPython(start_after_existing_ids, migrations.RunPython.noop),
+    ]
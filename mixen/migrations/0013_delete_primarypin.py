@@ -0,0 +1,16 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:14
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mixen', '0012_message_global_ids'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='PrimaryPin',
+        ),
+    ]
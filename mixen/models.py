@@ -1,5 +1,5 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, router, transaction
 from django.utils import timezone
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -7,6 +7,7 @@ from django.core.exceptions import PermissionDenied
 
 # Import ONLY from utils (no duplicate definitions here)
 from .utils import send_pending_email, send_approved_email, send_rejected_email
+from .routers import shard_for_match
 
 
 # ---------------------------
@@ -55,11 +56,51 @@ class Profile(models.Model):
     smoke = models.BooleanField(default=False)
     looking_for = models.CharField(max_length=100, blank=True)
 
+    # Written in coarse batches by mixen.presence, not on every request.
+    last_active = models.DateTimeField(null=True, blank=True, db_index=True)
+
     # ------------------------
     # COINS SYSTEM
     # ------------------------
     coins = models.IntegerField(default=30)  # Every new user gets 30 free coins
 
+    # Unread messages across all matches, kept in step with MatchReadState
+    # so the app badge is a single-row read.
+    unread_messages = models.IntegerField(default=0)
+
+    class Meta:
+        # Admin date navigation; added as indexes rather than db_index so
+        # SQLite creates them without rebuilding the table.
+        indexes = [models.Index(fields=["submitted_at"])]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+    def save(self, *args, **kwargs):
+        # A status change is published to the outbox in the same
+        # transaction as the update.
+        update_fields = kwargs.get("update_fields")
+        previous = getattr(self, "_loaded_status", None)
+        if (
+            self._state.adding
+            or previous in (None, self.status)
+            or (update_fields is not None and "status" not in update_fields)
+        ):
+            super().save(*args, **kwargs)
+        else:
+            using = kwargs.get("using") or router.db_for_write(Profile, instance=self)
+            with transaction.atomic(using=using):
+                super().save(*args, **kwargs)
+                publish_event(
+                    EventTopic.PROFILE_STATUS, self.user_id,
+                    {"user_id": self.user_id, "status": self.status, "previous": previous},
+                    using=using,
+                )
+        self._loaded_status = self.status
+
     def __str__(self):
         return self.user.username
 
@@ -72,6 +113,9 @@ class ProfileImage(models.Model):
     image_url = models.URLField()  # Firebase Storage URL
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["uploaded_at"])]
+
     def __str__(self):
         return f"Image for {self.profile.user.username}"
 
@@ -99,6 +143,7 @@ class Like(models.Model):
     class Meta:
         # Prevent duplicate likes
         unique_together = ("from_user", "to_user")
+        indexes = [models.Index(fields=["created_at"])]
 
     def __str__(self):
         return f"{self.from_user} liked {self.to_user}"
@@ -115,24 +160,359 @@ class Match(models.Model):
     class Meta:
         # Prevent duplicate matches
         unique_together = ("user1", "user2")
+        indexes = [models.Index(fields=["created_at"])]
 
     def __str__(self):
         return f"Match: {self.user1} & {self.user2}"
 
 
+# ---------------------------
+# BLOCKS AND REPORTS
+# ---------------------------
+class Block(models.Model):
+    """
+    `blocker` no longer sees `blocked` anywhere, and vice versa. Lists
+    apply blocks as NOT IN subqueries, so both directions are indexed.
+    """
+    blocker = models.ForeignKey(User, related_name="blocks_made", on_delete=models.CASCADE)
+    blocked = models.ForeignKey(User, related_name="blocks_received", on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("blocker", "blocked")
+        indexes = [models.Index(fields=["blocked", "blocker"])]
+
+    def __str__(self):
+        return f"{self.blocker} blocked {self.blocked}"
+
+
+class ReportReason(models.TextChoices):
+    SPAM = "SPAM"
+    FAKE_PROFILE = "FAKE_PROFILE"
+    HARASSMENT = "HARASSMENT"
+    INAPPROPRIATE = "INAPPROPRIATE"
+    UNDERAGE = "UNDERAGE"
+    OTHER = "OTHER"
+
+
+class Report(models.Model):
+    reporter = models.ForeignKey(User, related_name="reports_made", on_delete=models.CASCADE)
+    reported = models.ForeignKey(User, related_name="reports_received", on_delete=models.CASCADE)
+    reason = models.CharField(max_length=20, choices=ReportReason.choices)
+    details = models.TextField(blank=True)
+    resolved = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # Moderation queue: open reports, oldest first.
+        indexes = [models.Index(fields=["resolved", "created_at"])]
+
+    def __str__(self):
+        return f"{self.reporter} reported {self.reported} ({self.reason})"
+
+
 # ---------------------------
 # CHAT MESSAGE MODEL
 # ---------------------------
+class MessageQuerySet(models.QuerySet):
+    def for_match(self, match_id):
+        """
+        Messages live on the shard picked by hashing their match id.
+        """
+        return self.using(shard_for_match(match_id)).filter(match_id=match_id)
+
+
+class MessageId(models.Model):
+    """
+    Issues message ids on the primary. Each shard has its own
+    autoincrement, so ids taken from the shards would collide; rows here
+    are deleted as soon as they are issued, and the primary's sequence
+    never hands the same id out again.
+    """
+
+
+def allocate_message_id():
+    with transaction.atomic(using="default"):
+        issued = MessageId.objects.using("default").create()
+        MessageId.objects.using("default").filter(pk__lte=issued.pk).delete()
+    return issued.pk
+
+
 class Message(models.Model):
-    match = models.ForeignKey(Match, on_delete=models.CASCADE)
-    sender = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Unique across shards and kept when a conversation moves between
+    # them (see allocate_message_id()).
+    id = models.BigIntegerField(primary_key=True, editable=False)
+    # Messages may be stored on a different database than matches and
+    # users, so these relations carry no database-level constraint.
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, db_constraint=False)
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, db_constraint=False)
     text = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add, so rebalancing between shards keeps the original time.
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    objects = MessageQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=["match", "timestamp"])]
+
+    def save(self, *args, **kwargs):
+        if self.id is None:
+            self.id = allocate_message_id()
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Message from {self.sender}"
 
 
+# ---------------------------
+# READ RECEIPTS
+# ---------------------------
+class MatchReadState(models.Model):
+    """
+    Per-participant read pointer and unread counter for one match. Message
+    ids are local to a shard, so the pointer is a timestamp.
+    """
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name="read_states")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="read_states")
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("match", "user")
+
+    def __str__(self):
+        return f"{self.user} in match {self.match_id}: {self.unread_count} unread"
+
+
+# ---------------------------
+# LIKE / MESSAGE / REPORT ACTIONS
+# ---------------------------
+def record_like(from_user, to_user):
+    """
+    Saves a like and, if it is mutual, the match. Returns the new Match or None.
+    """
+    with transaction.atomic():
+        like = Like.objects.create(from_user=from_user, to_user=to_user)
+        publish_event(EventTopic.LIKE_CREATED, like.id, {
+            "like_id": like.id, "from_user_id": from_user.id, "to_user_id": to_user.id,
+        })
+        if Like.objects.filter(from_user=to_user, to_user=from_user).exists():
+            match = Match.objects.create(user1=from_user, user2=to_user)
+            publish_event(EventTopic.MATCH_CREATED, match.id, {
+                "match_id": match.id, "user1_id": from_user.id, "user2_id": to_user.id,
+            })
+            return match
+    return None
+
+
+def send_message(match, sender, text):
+    """
+    Stores the message on its shard and bumps the recipient's unread
+    counters and the outbox on the primary. Without sharding this is one
+    transaction; with it, the shard commits first and the primary after.
+    """
+    recipient_id = match.user2_id if match.user1_id == sender.id else match.user1_id
+
+    with transaction.atomic(), transaction.atomic(using=shard_for_match(match.id)):
+        message = Message.objects.for_match(match.id).create(match=match, sender=sender, text=text)
+        updated = MatchReadState.objects.filter(match=match, user_id=recipient_id).update(
+            unread_count=models.F("unread_count") + 1
+        )
+        if not updated:
+            MatchReadState.objects.create(match=match, user_id=recipient_id, unread_count=1)
+        Profile.objects.filter(user_id=recipient_id).update(
+            unread_messages=models.F("unread_messages") + 1
+        )
+        publish_event(EventTopic.MESSAGE_CREATED, match.id, {
+            "message_id": message.id, "match_id": match.id,
+            "sender_id": sender.id, "recipient_id": recipient_id,
+        })
+    return message
+
+
+def mark_match_read(match, user, up_to):
+    """
+    Moves the user's read pointer to `up_to`, the timestamp of the newest
+    message they were shown, and recounts their unread messages after it,
+    so anything that arrived since stays unread. The pointer never moves
+    back. Returns the user's remaining unread total.
+    """
+    with transaction.atomic():
+        state, _ = MatchReadState.objects.get_or_create(match=match, user=user)
+        # Writing first takes the lock (SQLite has no SELECT ... FOR UPDATE):
+        # a concurrent send_message has then either committed its message
+        # or bumps the counter after this commits, never both or neither.
+        MatchReadState.objects.filter(pk=state.pk).update(unread_count=models.F("unread_count"))
+        state.refresh_from_db()
+        if state.last_read_at is None or up_to > state.last_read_at:
+            state.last_read_at = up_to
+        unread = (
+            Message.objects.for_match(match.id)
+            .filter(timestamp__gt=state.last_read_at)
+            .exclude(sender=user)
+            .count()
+        )
+        cleared = state.unread_count - unread
+        state.unread_count = unread
+        state.save(update_fields=["unread_count", "last_read_at"])
+        if cleared:
+            Profile.objects.filter(user=user).update(unread_messages=models.F("unread_messages") - cleared)
+    return Profile.objects.values_list("unread_messages", flat=True).get(user=user)
+
+
+def block_user(blocker, blocked):
+    """
+    Blocks `blocked` for `blocker`. Their match can no longer be read, so
+    both participants' unread counts for it are cleared in the same
+    transaction, keeping Profile.unread_messages equal to what the unread
+    views can still reach.
+    """
+    with transaction.atomic():
+        block, created = Block.objects.get_or_create(blocker=blocker, blocked=blocked)
+        clear_unread(MatchReadState.objects.filter(
+            models.Q(match__user1=blocker, match__user2=blocked)
+            | models.Q(match__user1=blocked, match__user2=blocker)
+        ))
+    return block, created
+
+
+def clear_unread(read_states):
+    """
+    Zeroes the unread counts of `read_states` and subtracts them from
+    their users' Profile.unread_messages. Callers run it in a transaction
+    and bump the "messages" version of the users involved.
+    """
+    for state in read_states.select_for_update().filter(unread_count__gt=0):
+        Profile.objects.filter(user_id=state.user_id).update(
+            unread_messages=models.F("unread_messages") - state.unread_count
+        )
+        MatchReadState.objects.filter(pk=state.pk).update(unread_count=0)
+
+
+def report_user(reporter, reported, reason, details=""):
+    """
+    Files a report and blocks the reported user, so they vanish from the
+    reporter's lists straight away.
+    """
+    with transaction.atomic():
+        report = Report.objects.create(reporter=reporter, reported=reported, reason=reason, details=details)
+        block_user(reporter, reported)
+    return report
+
+
+# ---------------------------
+# CHANGE VERSIONS (ETAGS)
+# ---------------------------
+class ChangeVersion(models.Model):
+    """
+    Opaque version token per scope and user (user_id 0 for global scopes),
+    replaced whenever the rows behind it change. Kept in the database so
+    every worker sees the same tokens, and replicated with the data so a
+    replica read gets the tokens matching what it returns.
+    """
+    scope = models.CharField(max_length=20)
+    user_id = models.BigIntegerField()
+    token = models.CharField(max_length=16)
+
+    class Meta:
+        unique_together = ("scope", "user_id")
+
+    def __str__(self):
+        return f"{self.scope}:{self.user_id} = {self.token}"
+
+
+# ---------------------------
+# EXPORT HIGH-WATER MARKS
+# ---------------------------
+class ExportCursor(models.Model):
+    """
+    Last exported id per consumer, stream and database, so incremental
+    exports only read rows added since the previous run.
+    """
+    name = models.CharField(max_length=100)
+    stream = models.CharField(max_length=50)
+    database = models.CharField(max_length=50, default="default")
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("name", "stream", "database")
+
+    def __str__(self):
+        return f"{self.name}/{self.stream}@{self.database}: {self.last_id}"
+
+
+# ---------------------------
+# DOMAIN EVENT OUTBOX
+# ---------------------------
+class EventTopic(models.TextChoices):
+    LIKE_CREATED = "like.created"
+    MATCH_CREATED = "match.created"
+    MESSAGE_CREATED = "message.created"
+    PROFILE_STATUS = "profile.status"
+
+
+class OutboxEvent(models.Model):
+    """
+    Append-only feed of domain events, written in the same transaction as
+    the change it describes. The id is the consumer offset: SQLite's
+    AUTOINCREMENT never reuses ids, and writers commit one at a time, so
+    offsets only ever grow. See mixen.outbox for consumers and pruning.
+    """
+    topic = models.CharField(max_length=50, choices=EventTopic.choices)
+    # Entity the event is about; compaction keeps the newest event per key.
+    key = models.CharField(max_length=64)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["topic", "key", "id"])]
+
+    def __str__(self):
+        return f"#{self.id} {self.topic} {self.key}"
+
+
+def publish_event(topic, key, payload, using="default"):
+    """
+    Appends an event. Call inside the transaction making the change, so
+    the event exists exactly when the change does.
+    """
+    return OutboxEvent.objects.using(using).create(topic=topic, key=str(key), payload=payload)
+
+
+# ---------------------------
+# ACCOUNT DELETION JOBS
+# ---------------------------
+class DeletionStatus(models.TextChoices):
+    PENDING = "PENDING"    # User deactivated, rows not touched yet
+    RUNNING = "RUNNING"    # Dependent rows being removed in chunks
+    DONE = "DONE"          # User row deleted
+    FAILED = "FAILED"      # Stopped on an error; rerun to resume
+
+
+class AccountDeletion(models.Model):
+    """
+    Progress of a background account deletion. Keeps the id rather than a
+    foreign key because the user row is the last thing removed.
+    """
+    user_id = models.BigIntegerField(db_index=True)
+    username = models.CharField(max_length=150)
+    status = models.CharField(
+        max_length=20,
+        choices=DeletionStatus.choices,
+        default=DeletionStatus.PENDING
+    )
+    step = models.CharField(max_length=50, blank=True)
+    rows_deleted = models.BigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    requested_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Deletion of {self.username} ({self.status})"
+
+
 # ---------------------------
 # SUBMIT PROFILE FOR REVIEW
 # ---------------------------
@@ -0,0 +1,133 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, Min, OuterRef
+from django.utils import timezone
+
+from .models import EventTopic, OutboxEvent, ExportCursor
+
+
+# ----------------------------
+# OUTBOX CONSUMERS
+# ----------------------------
+# Notifications, analytics and moderation follow OutboxEvent instead of
+# polling the likes, matches, messages and profiles tables. Each consumer
+# keeps its offset (the last event id it processed) as an ExportCursor
+# with stream "outbox", and reads forward from it by primary key.
+
+OUTBOX_STREAM = "outbox"
+
+# Topics where only the latest event per key matters: a consumer that
+# falls behind needs a profile's current status, not every step.
+COMPACTED_TOPICS = (EventTopic.PROFILE_STATUS,)
+
+
+def read_events(after=0, limit=500, topics=None):
+    """
+    Up to `limit` events with an id above `after`, oldest first.
+    """
+    events = OutboxEvent.objects.filter(id__gt=after)
+    if topics:
+        events = events.filter(topic__in=topics)
+    return list(events.order_by("id")[:limit])
+
+
+class Consumer:
+    """
+    Reads the outbox in batches from a named, persisted offset:
+
+        consumer = Consumer("notifications", topics=["match.created"])
+        for batch in consumer.batches():
+            handle(batch)           # offset advances after each batch
+
+    A batch that raises is not committed and is read again next time, so
+    handlers must tolerate seeing an event twice.
+    """
+
+    def __init__(self, name, topics=None, batch_size=500):
+        self.name = name
+        self.topics = topics
+        self.batch_size = batch_size
+
+    @property
+    def offset(self):
+        return (
+            ExportCursor.objects.filter(name=self.name, stream=OUTBOX_STREAM, database="default")
+            .values_list("last_id", flat=True)
+            .first()
+        ) or 0
+
+    def poll(self):
+        return read_events(self.offset, self.batch_size, self.topics)
+
+    def commit(self, offset):
+        ExportCursor.objects.update_or_create(
+            name=self.name, stream=OUTBOX_STREAM, database="default",
+            defaults={"last_id": offset},
+        )
+
+    def batches(self):
+        """
+        Yields batches until the consumer has caught up, committing the
+        offset after each one is handled.
+        """
+        while True:
+            batch = self.poll()
+            if not batch:
+                return
+            yield batch
+            self.commit(batch[-1].id)
+
+
+def consumer_offsets():
+    return dict(
+        ExportCursor.objects.filter(stream=OUTBOX_STREAM).values_list("name", "last_id")
+    )
+
+
+# ----------------------------
+# RETENTION AND COMPACTION
+# ----------------------------
+
+def _delete_in_chunks(queryset, chunk_size):
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list("id", flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            OutboxEvent.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+
+
+def purge_events(older_than=None, chunk_size=5000):
+    """
+    Drops events past the retention window (settings.OUTBOX_RETENTION_DAYS).
+    Consumers that have not caught up by then lose those events.
+    """
+    if older_than is None:
+        older_than = timezone.now() - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    return _delete_in_chunks(OutboxEvent.objects.filter(created_at__lt=older_than), chunk_size)
+
+
+def compact_events(chunk_size=5000):
+    """
+    Drops events of COMPACTED_TOPICS superseded by a newer event for the
+    same key. Only events every consumer has already read are touched,
+    so no consumer skips a transition it has not seen.
+    """
+    superseded = OutboxEvent.objects.filter(
+        Exists(OutboxEvent.objects.filter(topic=OuterRef("topic"), key=OuterRef("key"), id__gt=OuterRef("id"))),
+        topic__in=COMPACTED_TOPICS,
+    )
+    offsets = consumer_offsets()
+    if offsets:
+        superseded = superseded.filter(id__lte=min(offsets.values()))
+    return _delete_in_chunks(superseded, chunk_size)
+
+
+def outbox_stats():
+    summary = OutboxEvent.objects.aggregate(first=Min("id"), oldest=Min("created_at"))
+    last = OutboxEvent.objects.order_by("-id").values_list("id", flat=True).first()
+    return {"first_offset": summary["first"], "last_offset": last, "oldest": summary["oldest"]}
@@ -0,0 +1,80 @@
+import atexit
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+
+from .models import Profile
+
+
+# ----------------------------
+# PRESENCE / LAST ACTIVE
+# ----------------------------
+
+class PresenceTracker:
+    """
+    Coalesces "user was active" events in memory. Each user is recorded at
+    most once per PRESENCE_GRANULARITY bucket, and pending buckets are
+    written with one UPDATE per bucket (chunked) every flush interval.
+    """
+
+    chunk_size = 500
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bucket = None
+        self._seen = set()
+        self._pending = {}
+        self._last_flush = time.monotonic()
+
+    def record(self, user_id):
+        """
+        Notes the user as active now. Never touches the database; returns
+        True when a flush is due, which the caller runs (in a thread under
+        ASGI).
+        """
+        bucket = int(time.time()) // settings.PRESENCE_GRANULARITY * settings.PRESENCE_GRANULARITY
+        with self._lock:
+            if bucket != self._bucket:
+                self._bucket = bucket
+                self._seen.clear()
+            if user_id not in self._seen:
+                self._seen.add(user_id)
+                self._pending[user_id] = bucket
+            # Checked on every call, so pending users are written even when
+            # only already-seen users are making requests.
+            return bool(self._pending) and time.monotonic() - self._last_flush >= settings.PRESENCE_FLUSH_INTERVAL
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        by_bucket = defaultdict(list)
+        for user_id, bucket in pending.items():
+            by_bucket[bucket].append(user_id)
+
+        for bucket, user_ids in by_bucket.items():
+            active_at = datetime.fromtimestamp(bucket, tz=dt_timezone.utc)
+            for start in range(0, len(user_ids), self.chunk_size):
+                Profile.objects.filter(user_id__in=user_ids[start:start + self.chunk_size]).update(
+                    last_active=active_at
+                )
+        return len(pending)
+
+
+presence = PresenceTracker()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        presence.flush()
+    except Exception:
+        # The database may already be gone at interpreter shutdown; losing
+        # one interval of presence is acceptable.
+        pass
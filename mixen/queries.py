@@ -0,0 +1,132 @@
+from django.conf import settings
+from django.db.models import Case, F, OuterRef, Q, Subquery, When
+
+from .models import User, ProfileImage, VerificationStatus, Like, Match, Block
+
+
+# ----------------------------
+# SHARED QUERIES
+# ----------------------------
+# Lazy querysets used by both the sync (DRF) and async views, so each
+# endpoint runs the same SQL whichever server serves it.
+
+# ?sort= values accepted by the swipe and matches lists.
+SORT_DEFAULT = "default"
+SORT_ACTIVE = "active"
+SORT_CHOICES = (SORT_DEFAULT, SORT_ACTIVE)
+
+
+def exclude_blocked(queryset, user, *fields):
+    """
+    Drops rows where any of the user `fields` blocked `user` or was
+    blocked by them. Each is a NOT IN subquery served by one of the Block
+    indexes, so lists stay a single statement however many blocks exist.
+    """
+    for field in fields:
+        queryset = queryset.exclude(
+            **{f"{field}__in": Block.objects.filter(blocker=user).values("blocked_id")}
+        ).exclude(
+            **{f"{field}__in": Block.objects.filter(blocked=user).values("blocker_id")}
+        )
+    return queryset
+
+
+def visible_users(user):
+    """
+    Active users `user` may interact with (like, message, view).
+    """
+    return exclude_blocked(User.objects.filter(is_active=True), user, "id")
+
+
+def swipe_candidates(user, sort=SORT_DEFAULT):
+    """
+    Approved users that `user` has not liked or matched yet, with their
+    profile and first image loaded in the same query. sort="active" puts
+    the most recently active users first.
+    """
+    first_image = (
+        ProfileImage.objects.filter(profile=OuterRef("profile"))
+        .order_by("id")
+        .values("image_url")[:1]
+    )
+    return (
+        visible_users(user)
+        .filter(profile__status=VerificationStatus.APPROVED)
+        .exclude(id=user.id)
+        .exclude(id__in=Like.objects.filter(from_user=user).values("to_user_id"))
+        .exclude(id__in=Match.objects.filter(user1=user).values("user2_id"))
+        .exclude(id__in=Match.objects.filter(user2=user).values("user1_id"))
+        .select_related("profile")
+        .annotate(profile_image=Subquery(first_image))
+        .order_by(*_swipe_ordering(sort))
+    )
+
+
+def _swipe_ordering(sort):
+    if sort == SORT_ACTIVE:
+        return (F("profile__last_active").desc(nulls_last=True), "id")
+    return ("id",)
+
+
+def swipe_page(user, page=1, sort=SORT_DEFAULT):
+    size = settings.SWIPE_PAGE_SIZE
+    start = (page - 1) * size
+    return swipe_candidates(user, sort)[start:start + size]
+
+
+def parse_sort(value):
+    """
+    Sort order from a query parameter; None when it is not recognised.
+    """
+    sort = value or SORT_DEFAULT
+    return sort if sort in SORT_CHOICES else None
+
+
+def parse_page(value):
+    """
+    Page number from a query parameter; None when it is not a positive int.
+    """
+    try:
+        page = int(value or 1)
+    except ValueError:
+        return None
+    return page if page >= 1 else None
+
+
+def swipe_card(u):
+    return {
+        "id": u.id,
+        "username": u.username,
+        "age": u.profile.age,
+        "bio": u.profile.bio,
+        "profile_image": u.profile_image,
+    }
+
+
+def user_matches(user, sort=SORT_DEFAULT):
+    # Accounts awaiting deletion are deactivated and drop out at once.
+    matches = exclude_blocked(
+        Match.objects.filter(Q(user1=user) | Q(user2=user))
+        .filter(user1__is_active=True, user2__is_active=True)
+        .select_related("user1__profile", "user2__profile"),
+        user, "user1", "user2",
+    )
+    if sort == SORT_ACTIVE:
+        partner_active = Case(
+            When(user1=user, then=F("user2__profile__last_active")),
+            default=F("user1__profile__last_active"),
+        )
+        return matches.order_by(partner_active.desc(nulls_last=True), "id")
+    return matches.order_by("id")
+
+
+def likes_received(user):
+    return exclude_blocked(
+        user.likes_received.filter(from_user__is_active=True).select_related("from_user"),
+        user, "from_user",
+    )
+
+
+def match_card(match, user):
+    other = match.user2 if match.user1_id == user.id else match.user1
+    return {"id": other.id, "username": other.username, "last_active": other.profile.last_active}
@@ -0,0 +1,193 @@
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core import signing
+
+
+# ----------------------------
+# PRIMARY / REPLICA ROUTING
+# ----------------------------
+
+class RoutingState:
+    """
+    Per-request routing decision. Reads go to the replica only while
+    `replica` is True; the first write flips it off for the rest of the
+    request, and the user is pinned to the primary once it finishes.
+    """
+
+    def __init__(self):
+        self.user_id = None
+        self.replica = False
+        self.wrote = False
+        # Set when a replica read missed a row and the request is retried
+        # on the primary.
+        self.primary_only = False
+
+
+_routing = ContextVar("mixen_routing", default=None)
+
+# The pin travels with the client, signed and timestamped, so checking it
+# costs no query. Browsers return the cookie; other clients can echo the
+# header instead.
+PIN_COOKIE = "mixen_primary"
+PIN_HEADER = "X-Mixen-Primary"
+
+
+def pin_to_primary(response, user_id):
+    """
+    Sends the user's reads to the primary for REPLICA_STICKY_SECONDS by
+    attaching a signed pin to `response`.
+    """
+    if not replica_configured():
+        return
+    pin = signing.dumps(user_id, salt=PIN_COOKIE)
+    response.set_cookie(
+        PIN_COOKIE, pin, max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite="Lax",
+    )
+    response[PIN_HEADER] = pin
+
+
+def is_pinned_to_primary(request, user_id):
+    pin = request.COOKIES.get(PIN_COOKIE) or request.headers.get(PIN_HEADER)
+    if not pin:
+        return False
+    try:
+        pinned_id = signing.loads(pin, salt=PIN_COOKIE, max_age=settings.REPLICA_STICKY_SECONDS)
+    except signing.BadSignature:
+        return False
+    return pinned_id == user_id
+
+
+def replica_configured():
+    return settings.REPLICA_DATABASE in settings.DATABASES
+
+
+@contextmanager
+def routing_scope():
+    """
+    Opens a fresh routing state for one request (primary by default).
+    Callers pin the user with finish_routing() after the scope closes.
+    """
+    state = RoutingState()
+    token = _routing.set(state)
+    try:
+        yield state
+    finally:
+        _routing.reset(token)
+
+
+def enable_replica_reads(state, request):
+    """
+    Sends the rest of the request's reads to the replica, unless the user
+    wrote recently and must read their own writes from the primary.
+    """
+    state.replica = (
+        replica_configured()
+        and not state.primary_only
+        and not is_pinned_to_primary(request, state.user_id)
+    )
+
+
+def finish_routing(state, response):
+    """
+    Pins a user who wrote during the request, on the way out.
+    """
+    if state.wrote and state.user_id is not None:
+        pin_to_primary(response, state.user_id)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is not None and state.replica:
+            return settings.REPLICA_DATABASE
+        # Explicit, so related lookups from a sharded Message (whose own
+        # database is a message shard) still resolve users and matches here.
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.replica = False
+            state.wrote = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+# ----------------------------
+# MESSAGE SHARDING
+# ----------------------------
+
+MESSAGE_MODEL = "mixen.message"
+MATCH_MODEL = "mixen.match"
+
+
+def shard_for_match(match_id, shards=None):
+    """
+    Picks the message shard for a conversation with rendezvous hashing:
+    adding a shard only moves the conversations that now hash to it.
+    """
+    shards = settings.MESSAGE_SHARDS if shards is None else shards
+    if len(shards) == 1:
+        return shards[0]
+
+    def weight(alias):
+        digest = hashlib.blake2b(f"{alias}:{match_id}".encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big")
+
+    return max(shards, key=weight)
+
+
+def _is_message(model):
+    return model._meta.label_lower == MESSAGE_MODEL
+
+
+def _is_match(model):
+    return model._meta.label_lower == MATCH_MODEL
+
+
+class MessageShardRouter:
+    """
+    Places each Message on the shard of its match. Querysets without an
+    instance hint should go through `Message.objects.for_match()`.
+    """
+
+    def _shard(self, model, hints):
+        instance = hints.get("instance")
+        if not _is_message(model) or instance is None:
+            return None
+        # The hint is the message itself, or the match for `match.message_set`.
+        # Any other instance (e.g. a user for `user.message_set`) says nothing
+        # about the shard.
+        if _is_message(instance):
+            match_id = instance.match_id
+        elif _is_match(instance):
+            match_id = instance.pk
+        else:
+            match_id = None
+        if match_id is None:
+            return None
+        return shard_for_match(match_id)
+
+    def db_for_read(self, model, **hints):
+        return self._shard(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._shard(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Dedicated shard databases only carry the message table.
+        if db in settings.MESSAGE_SHARDS and db != "default":
+            return app_label == "mixen" and model_name == "message"
+        return None
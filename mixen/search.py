@@ -0,0 +1,156 @@
+import re
+
+from django.db import connections, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Profile, VerificationStatus
+from .queries import exclude_blocked
+
+
+# ----------------------------
+# PROFILE FULL-TEXT SEARCH (SQLite FTS5)
+# ----------------------------
+# mixen_profile_search is an FTS5 index of username, bio, location and
+# looking_for, with rowid = profile id. Triggers on mixen_profile and
+# mixen_user keep it in sync. ensure_search_index() runs after every
+# migrate because SQLite table rebuilds during migrations drop triggers.
+
+SEARCH_TABLE = "mixen_profile_search"
+
+_INDEX_ROW = f"""
+    INSERT INTO {SEARCH_TABLE} (rowid, username, bio, location, looking_for)
+    SELECT p.id, u.username, p.bio, p.location, p.looking_for
+    FROM mixen_profile p JOIN mixen_user u ON u.id = p.user_id
+"""
+
+SEARCH_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE}
+    USING fts5(username, bio, location, looking_for, tokenize = 'unicode61 remove_diacritics 2')
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS mixen_profile_search_ai AFTER INSERT ON mixen_profile BEGIN
+        {_INDEX_ROW} WHERE p.id = new.id;
+    END
+    """,
+    # Profiles are saved on every coin spend; only reindex when a searched
+    # column actually changed.
+    f"""
+    CREATE TRIGGER IF NOT EXISTS mixen_profile_search_au AFTER UPDATE ON mixen_profile
+    WHEN old.bio IS NOT new.bio OR old.location IS NOT new.location
+        OR old.looking_for IS NOT new.looking_for OR old.user_id IS NOT new.user_id
+    BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+        {_INDEX_ROW} WHERE p.id = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS mixen_profile_search_ad AFTER DELETE ON mixen_profile BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS mixen_user_search_au AFTER UPDATE OF username ON mixen_user
+    WHEN old.username IS NOT new.username
+    BEGIN
+        UPDATE {SEARCH_TABLE} SET username = new.username
+        WHERE rowid = (SELECT id FROM mixen_profile WHERE user_id = new.id);
+    END
+    """,
+]
+
+
+def search_supported(using="default"):
+    return connections[using].vendor == "sqlite"
+
+
+def ensure_search_index(using="default"):
+    """
+    Creates the FTS table and triggers if missing, backfilling a new table.
+    """
+    if not search_supported(using) or not router.allow_migrate_model(using, Profile):
+        return
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        existed = SEARCH_TABLE in connection.introspection.table_names(cursor)
+        for statement in SEARCH_SCHEMA:
+            cursor.execute(statement)
+        if not existed:
+            # Weight username matches highest, then location and intent.
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rank) VALUES ('rank', 'bm25(10.0, 1.0, 2.0, 2.0)')")
+            cursor.execute(_INDEX_ROW)
+
+
+def rebuild_search_index(using="default"):
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        cursor.execute(_INDEX_ROW)
+
+
+def fts_query(text):
+    """
+    Turns free text into an FTS5 query: every word must match, the last
+    one as a prefix so results update while the user types. Returns None
+    when there is nothing to search for.
+    """
+    words = re.findall(r"\w+", text)[:10]
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_profile_ids(text, exclude_user=None, limit=20, offset=0, using="default"):
+    """
+    Ids of approved profiles matching `text`, best match first.
+    """
+    query = fts_query(text)
+    if query is None:
+        return []
+
+    if not search_supported(using):
+        profiles = Profile.objects.using(using).filter(
+            status=VerificationStatus.APPROVED, user__is_active=True
+        ).filter(
+            Q(user__username__icontains=text) | Q(bio__icontains=text)
+            | Q(location__icontains=text) | Q(looking_for__icontains=text)
+        )
+        if exclude_user is not None:
+            profiles = exclude_blocked(profiles.exclude(user=exclude_user), exclude_user, "user")
+        return list(profiles.order_by("id").values_list("id", flat=True)[offset:offset + limit])
+
+    sql = f"""
+        SELECT p.id FROM {SEARCH_TABLE} s
+        JOIN mixen_profile p ON p.id = s.rowid
+        JOIN mixen_user u ON u.id = p.user_id AND u.is_active
+        WHERE {SEARCH_TABLE} MATCH %s AND p.status = %s AND p.user_id != %s
+            AND p.user_id NOT IN (SELECT blocked_id FROM mixen_block WHERE blocker_id = %s)
+            AND p.user_id NOT IN (SELECT blocker_id FROM mixen_block WHERE blocked_id = %s)
+        ORDER BY s.rank
+        LIMIT %s OFFSET %s
+    """
+    exclude_id = exclude_user.pk if exclude_user is not None else 0
+    params = [query, VerificationStatus.APPROVED, exclude_id, exclude_id, exclude_id, limit, offset]
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def filter_by_search(queryset, text):
+    """
+    Restricts a Profile queryset to FTS matches (used by the admin).
+    """
+    query = fts_query(text)
+    if query is None:
+        return queryset
+    if not search_supported(queryset.db):
+        return queryset.filter(
+            Q(user__username__icontains=text) | Q(bio__icontains=text)
+            | Q(location__icontains=text) | Q(looking_for__icontains=text)
+        )
+    return queryset.filter(
+        id__in=RawSQL(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", [query])
+    )
@@ -0,0 +1,106 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_migrate, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import archive
+from .models import Profile, ProfileImage, Like, Match, Message, MatchReadState, Block, VerificationStatus
+from .search import ensure_search_index
+from .versions import bump, bump_global
+
+
+# ---------------------------
+# CHANGE VERSIONS (ETAGS AND RESPONSE CACHE KEYS)
+# ---------------------------
+# Fields of a Profile that appear on other users' swipe cards.
+DECK_FIELDS = ("status", "age", "bio")
+
+
+def _deck_state(profile):
+    return tuple(getattr(profile, field) for field in DECK_FIELDS)
+
+
+@receiver(post_init, sender=Profile)
+def remember_deck_state(sender, instance, **kwargs):
+    instance._deck_state = _deck_state(instance)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def profile_changed(sender, instance, **kwargs):
+    bump("profile", instance.user_id)
+    # Coin spends save the profile too; only card changes touch the deck,
+    # and only profiles that are (or just stopped being) approved are on it.
+    previous = instance._deck_state
+    on_deck = VerificationStatus.APPROVED in (instance.status, previous[0])
+    if on_deck and (kwargs.get("created") is not False or _deck_state(instance) != previous):
+        bump_global("deck")
+    instance._deck_state = _deck_state(instance)
+
+
+# Signup uploads verification images before review; only images of
+# approved profiles are on anyone's deck.
+@receiver(post_save, sender=ProfileImage)
+@receiver(post_delete, sender=ProfileImage)
+def profile_image_changed(sender, instance, **kwargs):
+    if Profile.objects.filter(pk=instance.profile_id, status=VerificationStatus.APPROVED).exists():
+        bump_global("deck")
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+def like_changed(sender, instance, **kwargs):
+    bump("likes", instance.from_user_id, instance.to_user_id)
+
+
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+def match_changed(sender, instance, **kwargs):
+    bump("matches", instance.user1_id, instance.user2_id)
+
+
+# A block hides each user from the other's deck, likes and matches, and
+# clears the unread counts of their match.
+@receiver(post_save, sender=Block)
+@receiver(post_delete, sender=Block)
+def block_changed(sender, instance, **kwargs):
+    bump("likes", instance.blocker_id, instance.blocked_id)
+    bump("matches", instance.blocker_id, instance.blocked_id)
+    bump("messages", instance.blocker_id, instance.blocked_id)
+
+
+# Only new messages: a post_delete receiver would stop archival and shard
+# rebalancing from bulk-deleting moved rows.
+@receiver(post_save, sender=Message)
+def message_changed(sender, instance, **kwargs):
+    match = instance.match
+    bump("messages", match.user1_id, match.user2_id)
+
+
+# Marking a match read changes the reader's counts and the other user's
+# read receipt.
+@receiver(post_save, sender=MatchReadState)
+def read_state_changed(sender, instance, **kwargs):
+    match = instance.match
+    bump("messages", match.user1_id, match.user2_id)
+
+
+# ---------------------------
+# SHARDED AND ARCHIVED MESSAGES
+# ---------------------------
+# Django's cascade only looks for messages on 'default', so deleting a
+# match (directly, or through its user) clears its shard and archive here.
+@receiver(pre_delete, sender=Match)
+def delete_match_messages(sender, instance, **kwargs):
+    match_id = instance.pk
+    Message.objects.for_match(match_id).delete()
+    # Files cannot be rolled back, so they go once the match really has.
+    transaction.on_commit(lambda: archive.delete_archive(match_id))
+
+
+# ---------------------------
+# PROFILE SEARCH INDEX
+# ---------------------------
+@receiver(post_migrate)
+def create_search_index(sender, using, **kwargs):
+    if sender.name == "mixen":
+        ensure_search_index(using)
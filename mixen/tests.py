@@ -1,3 +1,473 @@
-from django.test import TestCase
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core import signing
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import archive
+from .deletion import process_deletion, request_account_deletion
+from .models import (
+    Match, MatchReadState, Message, Profile, User, block_user, mark_match_read, send_message,
+)
+from .routers import (
+    PIN_COOKIE, PIN_HEADER, MessageShardRouter, PrimaryReplicaRouter, enable_replica_reads, finish_routing,
+    is_pinned_to_primary, pin_to_primary, routing_scope, shard_for_match,
+)
+
+
+class MessagingTestCase(TestCase):
+    # Messages live on the shards when MIXEN_MESSAGE_SHARDS is set.
+    databases = {"default", *settings.MESSAGE_SHARDS}
+
+    def setUp(self):
+        # Rows written inside the test transaction are only visible on the
+        # primary; replica routing is covered by ReplicaPinTests.
+        replica = mock.patch("mixen.routers.replica_configured", return_value=False)
+        replica.start()
+        self.addCleanup(replica.stop)
+        self.alice = User.objects.create_user(username="alice", email="alice@example.com", password="pw")
+        self.bob = User.objects.create_user(username="bob", email="bob@example.com", password="pw")
+        self.match = Match.objects.create(user1=self.alice, user2=self.bob)
+
+    def add_message(self, sender, timestamp, text="hi"):
+        return Message.objects.for_match(self.match.id).create(
+            match=self.match, sender=sender, text=text, timestamp=timestamp,
+        )
+
+    def table_ids(self):
+        return list(Message.objects.for_match(self.match.id).order_by("timestamp", "id").values_list("id", flat=True))
+
+    def client_for(self, user):
+        client = APIClient()
+        # A fresh instance: views save the whole profile (spend_coins).
+        client.force_authenticate(User.objects.get(pk=user.pk))
+        return client
+
+
+# ----------------------------
+# MESSAGE ARCHIVE
+# ----------------------------
+
+class ArchiveTests(MessagingTestCase):
+    def setUp(self):
+        super().setUp()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        archive_settings = override_settings(MESSAGE_ARCHIVE_ROOT=root.name)
+        archive_settings.enable()
+        self.addCleanup(archive_settings.disable)
+        self.old = timezone.now() - timedelta(days=settings.MESSAGE_ARCHIVE_AFTER_DAYS + 10)
+
+    def archive_messages(self, **options):
+        call_command("archive_messages", stdout=StringIO(), **options)
+
+    def archived_ids(self, **bounds):
+        return [row["id"] for row in archive.read_archived(self.match.id, limit=100, **bounds)]
+
+    def test_old_messages_move_to_archive_in_blocks(self):
+        messages = [self.add_message(self.alice, self.old + timedelta(seconds=i)) for i in range(5)]
+        recent = self.add_message(self.bob, timezone.now())
+
+        self.archive_messages(block_size=2)
+
+        self.assertEqual(self.table_ids(), [recent.id])
+        self.assertEqual(self.archived_ids(), [m.id for m in messages])
+        self.assertEqual([count for *_, count in archive.read_index(self.match.id)], [2, 2, 1])
+        self.assertEqual(archive.archived_until(self.match.id), messages[-1].timestamp)
+
+    def test_timestamps_round_trip_exactly(self):
+        message = self.add_message(self.alice, self.old.replace(microsecond=999999))
+
+        self.archive_messages()
+
+        self.assertEqual(archive.read_archived(self.match.id)[0]["timestamp"], message.timestamp)
+
+    def test_later_runs_append_newer_messages(self):
+        first = self.add_message(self.alice, self.old)
+        self.archive_messages()
+        second = self.add_message(self.bob, self.old + timedelta(minutes=1))
+
+        self.archive_messages()
+
+        self.assertEqual(self.archived_ids(), [first.id, second.id])
+        self.assertEqual(len(archive.read_index(self.match.id)), 2)
+
+    def test_rerun_after_interrupted_delete_does_not_duplicate(self):
+        messages = [self.add_message(self.alice, self.old + timedelta(seconds=i)) for i in range(3)]
+        self.archive_messages()
+        # A run that stopped after writing the block but before deleting
+        # the rows leaves them in the table.
+        for m in messages:
+            Message.objects.for_match(self.match.id).create(
+                id=m.id, match=self.match, sender=m.sender, text=m.text, timestamp=m.timestamp,
+            )
+
+        self.archive_messages()
+
+        self.assertEqual(self.table_ids(), [])
+        self.assertEqual(self.archived_ids(), [m.id for m in messages])
+        self.assertEqual(len(archive.read_index(self.match.id)), 1)
+
+    def test_read_archived_pages_by_timestamp_and_id(self):
+        tied = [self.add_message(self.alice, self.old) for _ in range(3)]
+        self.archive_messages()
+
+        self.assertEqual(self.archived_ids(before=self.old, before_id=tied[2].id), [tied[0].id, tied[1].id])
+        self.assertEqual(self.archived_ids(before=self.old), [])
+
+    def test_history_merges_archive_and_table(self):
+        archived = [self.add_message(self.alice, self.old + timedelta(seconds=i)) for i in range(3)]
+        self.archive_messages()
+        recent = [self.add_message(self.bob, timezone.now() - timedelta(minutes=5 - i)) for i in range(2)]
+
+        response = self.client_for(self.alice).get("/api/messages/", {"user": self.bob.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([m["id"] for m in response.data["messages"]], [m.id for m in archived + recent])
+
+    def test_history_pages_back_into_archive(self):
+        archived = [self.add_message(self.alice, self.old) for _ in range(3)]
+        self.archive_messages()
+        recent = self.add_message(self.bob, timezone.now())
+        client = self.client_for(self.alice)
+
+        first = client.get("/api/messages/", {"user": self.bob.id, "limit": 2}).data["messages"]
+        oldest = first[0]
+        second = client.get("/api/messages/", {
+            "user": self.bob.id, "limit": 2, "before": oldest["timestamp"], "before_id": oldest["id"],
+        }).data["messages"]
+
+        self.assertEqual([m["id"] for m in first], [archived[2].id, recent.id])
+        self.assertEqual([m["id"] for m in second], [archived[0].id, archived[1].id])
+
+    def test_history_shows_leftover_rows_once(self):
+        archived = [self.add_message(self.alice, self.old + timedelta(seconds=i)) for i in range(2)]
+        self.archive_messages()
+        # Still in the table as well, as after an interrupted archive run.
+        Message.objects.for_match(self.match.id).create(
+            id=archived[1].id, match=self.match, sender=self.alice, text="hi", timestamp=archived[1].timestamp,
+        )
+
+        response = self.client_for(self.bob).get("/api/messages/", {"user": self.alice.id})
+
+        self.assertEqual([m["id"] for m in response.data["messages"]], [m.id for m in archived])
+
+    def test_deleting_match_removes_archive(self):
+        self.add_message(self.alice, self.old)
+        self.archive_messages()
+        match_id = self.match.id
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.match.delete()
+
+        self.assertEqual(archive.read_index(match_id), [])
+
+
+# ----------------------------
+# UNREAD COUNTERS
+# ----------------------------
+
+class UnreadCountTests(MessagingTestCase):
+    def unread_total(self, user):
+        return Profile.objects.values_list("unread_messages", flat=True).get(user=user)
+
+    def unread_in_match(self, user):
+        return MatchReadState.objects.values_list("unread_count", flat=True).get(match=self.match, user=user)
+
+    def test_send_counts_for_recipient_only(self):
+        send_message(self.match, self.alice, "one")
+        send_message(self.match, self.alice, "two")
+        send_message(self.match, self.bob, "three")
+
+        self.assertEqual((self.unread_total(self.bob), self.unread_in_match(self.bob)), (2, 2))
+        self.assertEqual((self.unread_total(self.alice), self.unread_in_match(self.alice)), (1, 1))
+
+    def test_read_clears_messages_up_to_the_displayed_one(self):
+        shown = send_message(self.match, self.alice, "one")
+        send_message(self.match, self.alice, "two")
+
+        remaining = mark_match_read(self.match, self.bob, shown.timestamp)
+
+        self.assertEqual(remaining, 1)
+        self.assertEqual((self.unread_total(self.bob), self.unread_in_match(self.bob)), (1, 1))
+
+    def test_read_pointer_never_moves_back(self):
+        first = send_message(self.match, self.alice, "one")
+        last = send_message(self.match, self.alice, "two")
+        mark_match_read(self.match, self.bob, last.timestamp)
+
+        remaining = mark_match_read(self.match, self.bob, first.timestamp)
+
+        self.assertEqual(remaining, 0)
+        self.assertEqual(MatchReadState.objects.get(match=self.match, user=self.bob).last_read_at, last.timestamp)
+
+    def test_read_endpoint(self):
+        shown = send_message(self.match, self.alice, "one")
+        client = self.client_for(self.bob)
+
+        response = client.post("/api/messages/read/", {"user": self.alice.id, "up_to": shown.timestamp.isoformat()})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["unread_total"], 0)
+        self.assertEqual(client.get("/api/unread/").data, {"total": 0, "matches": []})
+
+    def test_read_endpoint_rejects_bad_input(self):
+        client = self.client_for(self.bob)
+
+        bad_user = client.post("/api/messages/read/", {"user": "abc", "up_to": "2024-01-01T00:00:00Z"})
+        bad_up_to = client.post("/api/messages/read/", {"user": self.alice.id, "up_to": "soon"})
+
+        self.assertEqual((bad_user.status_code, bad_up_to.status_code), (400, 400))
+
+    def test_block_clears_both_sides(self):
+        send_message(self.match, self.alice, "one")
+        send_message(self.match, self.bob, "two")
+
+        block_user(self.bob, self.alice)
+
+        for user in (self.alice, self.bob):
+            self.assertEqual((self.unread_total(user), self.unread_in_match(user)), (0, 0))
+
+    def test_block_keeps_other_matches(self):
+        carol = User.objects.create_user(username="carol", email="carol@example.com", password="pw")
+        other = Match.objects.create(user1=carol, user2=self.bob)
+        send_message(self.match, self.alice, "one")
+        send_message(other, carol, "two")
+
+        block_user(self.bob, self.alice)
+
+        self.assertEqual(self.unread_total(self.bob), 1)
+        unread = self.client_for(self.bob).get("/api/unread/").data
+        self.assertEqual(unread["matches"], [{"user_id": carol.id, "unread": 1}])
+
+    def test_deletion_request_clears_partners(self):
+        send_message(self.match, self.alice, "one")
+
+        request_account_deletion(User.objects.get(pk=self.alice.pk))
+
+        self.assertEqual((self.unread_total(self.bob), self.unread_in_match(self.bob)), (0, 0))
+
+    def test_deletion_removes_messages_and_matches(self):
+        send_message(self.match, self.alice, "one")
+        send_message(self.match, self.bob, "two")
+        job = request_account_deletion(User.objects.get(pk=self.alice.pk))
+
+        process_deletion(job)
+
+        self.assertEqual(self.table_ids(), [])
+        self.assertFalse(Match.objects.filter(pk=self.match.pk).exists())
+        self.assertEqual(self.unread_total(self.bob), 0)
+
+
+# ----------------------------
+# MESSAGE SHARDS
+# ----------------------------
+
+SHARDS = ["messages_0", "messages_1", "messages_2"]
+
+
+class ShardRoutingTests(MessagingTestCase):
+    def test_single_shard(self):
+        self.assertEqual(shard_for_match(7, ["default"]), "default")
+
+    def test_spreads_matches_over_shards(self):
+        placed = {shard_for_match(match_id, SHARDS) for match_id in range(100)}
+        self.assertEqual(placed, set(SHARDS))
+
+    def test_adding_a_shard_only_moves_matches_to_it(self):
+        for match_id in range(500):
+            before = shard_for_match(match_id, SHARDS[:2])
+            after = shard_for_match(match_id, SHARDS)
+            self.assertIn(after, (before, SHARDS[2]))
+
+    @override_settings(MESSAGE_SHARDS=SHARDS)
+    def test_router_uses_the_match_of_the_hint(self):
+        router = MessageShardRouter()
+        expected = shard_for_match(self.match.id)
+
+        self.assertEqual(router.db_for_write(Message, instance=Message(match_id=self.match.id)), expected)
+        self.assertEqual(router.db_for_read(Message, instance=self.match), expected)
+        # A user's messages span every shard; a match is not a message.
+        self.assertIsNone(router.db_for_read(Message, instance=self.alice))
+        self.assertIsNone(router.db_for_read(Match, instance=self.match))
+
+    @override_settings(MESSAGE_SHARDS=SHARDS)
+    def test_shards_only_migrate_messages(self):
+        router = MessageShardRouter()
+
+        self.assertTrue(router.allow_migrate("messages_1", "mixen", model_name="message"))
+        self.assertFalse(router.allow_migrate("messages_1", "mixen", model_name="match"))
+        self.assertIsNone(router.allow_migrate("default", "mixen", model_name="match"))
+
+    def test_message_ids_are_unique_across_matches(self):
+        carol = User.objects.create_user(username="carol", email="carol@example.com", password="pw")
+        matches = [self.match, Match.objects.create(user1=carol, user2=self.bob)]
+
+        ids = [send_message(match, match.user1, "hi").id for match in matches * 3]
+
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(ids, sorted(ids))
+
+    def test_rebalance_rejects_unknown_source(self):
+        with self.assertRaises(CommandError):
+            call_command("rebalance_message_shards", source=["missing"], stdout=StringIO())
+
+
+@skipUnless(len(settings.MESSAGE_SHARDS) > 1, "run with MIXEN_MESSAGE_SHARDS=2 or more")
+class RebalanceTests(MessagingTestCase):
+    def setUp(self):
+        super().setUp()
+        others = [
+            User.objects.create_user(username=f"user{i}", email=f"user{i}@example.com", password="pw")
+            for i in range(7)
+        ]
+        self.matches = [self.match] + [Match.objects.create(user1=other, user2=self.bob) for other in others]
+        # Everything written while the first shard was the only one.
+        with override_settings(MESSAGE_SHARDS=settings.MESSAGE_SHARDS[:1]):
+            self.sent = [send_message(match, match.user1, "hi") for match in self.matches * 3]
+
+    def placement(self):
+        return {
+            alias: sorted(Message.objects.using(alias).values_list("id", flat=True))
+            for alias in settings.MESSAGE_SHARDS
+        }
+
+    def test_moves_conversations_to_their_shard_keeping_ids(self):
+        call_command("rebalance_message_shards", chunk_size=2, stdout=StringIO())
+
+        expected = {alias: [] for alias in settings.MESSAGE_SHARDS}
+        for message in self.sent:
+            expected[shard_for_match(message.match_id)].append(message.id)
+        self.assertTrue(any(expected[alias] for alias in settings.MESSAGE_SHARDS[1:]))
+        self.assertEqual(self.placement(), {alias: sorted(ids) for alias, ids in expected.items()})
+
+    def test_dry_run_moves_nothing(self):
+        before = self.placement()
+
+        call_command("rebalance_message_shards", dry_run=True, stdout=StringIO())
+
+        self.assertEqual(self.placement(), before)
+
+    def test_history_after_rebalance(self):
+        call_command("rebalance_message_shards", stdout=StringIO())
+
+        response = self.client_for(self.bob).get("/api/messages/", {"user": self.alice.id})
+
+        expected = [m.id for m in self.sent if m.match_id == self.match.id]
+        self.assertEqual([m["id"] for m in response.data["messages"]], expected)
+
+
+# ----------------------------
+# PRIMARY / REPLICA ROUTING
+# ----------------------------
+
+@mock.patch("mixen.routers.replica_configured", return_value=True)
+class ReplicaPinTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def pinned_response(self, user_id):
+        response = HttpResponse()
+        pin_to_primary(response, user_id)
+        return response
+
+    def test_pin_is_sent_as_cookie_and_header(self, _):
+        response = self.pinned_response(3)
+
+        self.assertEqual(signing.loads(response.cookies[PIN_COOKIE].value, salt=PIN_COOKIE), 3)
+        self.assertEqual(response[PIN_HEADER], response.cookies[PIN_COOKIE].value)
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], settings.REPLICA_STICKY_SECONDS)
+
+    def test_pin_from_cookie_or_header(self, _):
+        pin = self.pinned_response(3)[PIN_HEADER]
+
+        self.assertTrue(is_pinned_to_primary(self.factory.get("/", HTTP_COOKIE=f"{PIN_COOKIE}={pin}"), 3))
+        self.assertTrue(is_pinned_to_primary(self.factory.get("/", headers={PIN_HEADER: pin}), 3))
+        self.assertFalse(is_pinned_to_primary(self.factory.get("/"), 3))
+
+    def test_pin_only_covers_its_user(self, _):
+        pin = self.pinned_response(3)[PIN_HEADER]
+
+        self.assertFalse(is_pinned_to_primary(self.factory.get("/", headers={PIN_HEADER: pin}), 4))
+
+    def test_forged_pin_is_ignored(self, _):
+        forged = signing.dumps(3, salt="other")
+
+        self.assertFalse(is_pinned_to_primary(self.factory.get("/", headers={PIN_HEADER: forged}), 3))
+
+    def test_pin_expires(self, _):
+        pin = self.pinned_response(3)[PIN_HEADER]
+        request = self.factory.get("/", headers={PIN_HEADER: pin})
+
+        later = time.time() + settings.REPLICA_STICKY_SECONDS + 1
+        with mock.patch("django.core.signing.time.time", return_value=later):
+            self.assertFalse(is_pinned_to_primary(request, 3))
+
+    def test_replica_reads_unless_pinned(self, _):
+        pin = self.pinned_response(3)[PIN_HEADER]
+        with routing_scope() as state:
+            state.user_id = 3
+            enable_replica_reads(state, self.factory.get("/"))
+            self.assertTrue(state.replica)
+
+            enable_replica_reads(state, self.factory.get("/", headers={PIN_HEADER: pin}))
+            self.assertFalse(state.replica)
+
+    def test_retry_stays_on_primary(self, _):
+        with routing_scope() as state:
+            state.user_id, state.primary_only = 3, True
+            enable_replica_reads(state, self.factory.get("/"))
+            self.assertFalse(state.replica)
+
+    def test_write_moves_reads_to_primary_and_pins(self, _):
+        router = PrimaryReplicaRouter()
+        with routing_scope() as state:
+            state.user_id, state.replica = 3, True
+            self.assertEqual(router.db_for_read(Message), settings.REPLICA_DATABASE)
+
+            self.assertEqual(router.db_for_write(Message), "default")
+            self.assertEqual(router.db_for_read(Message), "default")
+        response = HttpResponse()
+        finish_routing(state, response)
+
+        self.assertTrue(is_pinned_to_primary(self.factory.get("/", headers={PIN_HEADER: response[PIN_HEADER]}), 3))
+
+    def test_read_only_request_is_not_pinned(self, _):
+        with routing_scope() as state:
+            state.user_id, state.replica = 3, True
+            PrimaryReplicaRouter().db_for_read(Message)
+        response = HttpResponse()
+        finish_routing(state, response)
+
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_outside_a_request_everything_uses_primary(self, _):
+        self.assertEqual(PrimaryReplicaRouter().db_for_read(Message), "default")
+
+
+class ReplicaPinViewTests(MessagingTestCase):
+    @mock.patch("mixen.routers.replica_configured", return_value=True)
+    def test_sender_reads_own_message_from_primary(self, _):
+        client = self.client_for(self.alice)
+
+        sent = client.post("/api/send-message/", {"to_user": self.bob.id, "text": "hi"})
+        # Without the pin this read would go to the replica.
+        history = client.get("/api/messages/", {"user": self.bob.id})
+
+        self.assertIn(PIN_COOKIE, sent.cookies)
+        self.assertEqual([m["text"] for m in history.data["messages"]], ["hi"])
+
+    def test_no_pin_without_replica(self):
+        sent = self.client_for(self.alice).post("/api/send-message/", {"to_user": self.bob.id, "text": "hi"})
+
+        self.assertEqual(sent.status_code, 200)
+        self.assertNotIn(PIN_COOKIE, sent.cookies)
+        self.assertNotIn(PIN_HEADER, sent)
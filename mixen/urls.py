@@ -1,5 +1,12 @@
 # misen_server/urls.py
 from django.urls import path
+from .async_views import (
+    AsyncProfileStatusView,
+    AsyncSwipeUsersView,
+    AsyncLikeUserView,
+    AsyncMatchesListView,
+    AsyncSendMessageView,
+)
 from .views import (
     RegisterView,
     JWTLoginView,
@@ -12,12 +19,23 @@ from .views import (
     MatchesListView,
     ViewLikesView,
     SendMessageView,
+    MessageHistoryView,
+    MarkMessagesReadView,
+    UnreadCountsView,
+    SearchProfilesView,
+    DeleteAccountView,
+    BlockUserView,
+    UnblockUserView,
+    ReportUserView,
+    AnalyticsExportView,
+    ResponseCacheStatsView,
 )
 
 urlpatterns = [
     # ---------------- User Auth ----------------
     path("register/", RegisterView.as_view(), name="register"),
     path("login/", JWTLoginView.as_view(), name="jwt-login"),
+    path("delete-account/", DeleteAccountView.as_view(), name="delete-account"),
 
     # ---------------- Upload Media ----------------
     path("upload-images/", UploadProfileImagesView.as_view(), name="upload-images"),
@@ -31,8 +49,26 @@ urlpatterns = [
     path("swipe/", SwipeUsersView.as_view(), name="swipe-users"),
     path("like/", LikeUserView.as_view(), name="like-user"),
     path("matches/", MatchesListView.as_view(), name="matches-list"),
+    path("search/", SearchProfilesView.as_view(), name="search-profiles"),
+    path("block/", BlockUserView.as_view(), name="block-user"),
+    path("unblock/", UnblockUserView.as_view(), name="unblock-user"),
+    path("report/", ReportUserView.as_view(), name="report-user"),
 
     # ---------------- Coins Features ----------------
     path("view-likes/", ViewLikesView.as_view(), name="view-likes"),
     path("send-message/", SendMessageView.as_view(), name="send-message"),
+    path("messages/", MessageHistoryView.as_view(), name="message-history"),
+    path("messages/read/", MarkMessagesReadView.as_view(), name="messages-read"),
+    path("unread/", UnreadCountsView.as_view(), name="unread-counts"),
+
+    # ---------------- Async (ASGI) ----------------
+    path("async/status/", AsyncProfileStatusView.as_view(), name="async-profile-status"),
+    path("async/swipe/", AsyncSwipeUsersView.as_view(), name="async-swipe-users"),
+    path("async/like/", AsyncLikeUserView.as_view(), name="async-like-user"),
+    path("async/matches/", AsyncMatchesListView.as_view(), name="async-matches-list"),
+    path("async/send-message/", AsyncSendMessageView.as_view(), name="async-send-message"),
+
+    # ---------------- Staff ----------------
+    path("export/<str:stream>/", AnalyticsExportView.as_view(), name="analytics-export"),
+    path("cache-stats/", ResponseCacheStatsView.as_view(), name="cache-stats"),
 ]
@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from django.core.mail import send_mail
 from django.conf import settings
 from django.db import transaction
@@ -36,8 +38,20 @@ def add_coins(user, amount):
 # EMAIL SYSTEM
 # ----------------------------
 
+# SMTP round trips take seconds; send on a small pool so neither request
+# threads nor the ASGI event loop wait on them.
+_email_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="mixen-email")
+
+
+def send_mail_in_background(**kwargs):
+    """
+    Queues an email once the current transaction commits.
+    """
+    transaction.on_commit(lambda: _email_executor.submit(send_mail, **kwargs))
+
+
 def send_pending_email(to_email):
-    send_mail(
+    send_mail_in_background(
         subject="Your account is under review",
         message="Thank you for submitting your profile. Your account is now pending admin approval.",
         from_email=settings.DEFAULT_FROM_EMAIL,
@@ -47,7 +61,7 @@ def send_pending_email(to_email):
 
 
 def send_approved_email(to_email):
-    send_mail(
+    send_mail_in_background(
         subject="Your account is approved 🎉",
         message="Congratulations! Your account has been approved. You can now access the app.",
         from_email=settings.DEFAULT_FROM_EMAIL,
@@ -59,7 +73,7 @@ def send_approved_email(to_email):
 def send_rejected_email(to_email, reasons_list):
     reasons_text = ", ".join(reasons_list)
 
-    send_mail(
+    send_mail_in_background(
         subject="Your account has been rejected",
         message=f"Sorry, your account has been rejected for the following reason(s):\n\n{reasons_text}",
         from_email=settings.DEFAULT_FROM_EMAIL,
@@ -0,0 +1,175 @@
+import hashlib
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework.response import Response
+
+from .models import ChangeVersion
+
+
+# ----------------------------
+# PER-USER CHANGE VERSIONS
+# ----------------------------
+# Each scope holds an opaque version token per user, replaced whenever the
+# rows behind it change (see signals.py). Polling endpoints derive their
+# ETag from these tokens, so an unchanged poll is answered with a 304
+# after one small query, without running the view's queries.
+#
+# Tokens are ChangeVersion rows rather than cache entries: every worker
+# process sees a bump, and bumps commit (or roll back) with the change.
+# Reads go through the router, so a view reading the replica compares
+# against the replica's tokens and never labels a lagging body as new.
+#
+# Scopes:
+#   profile   the user's own Profile
+#   likes     likes sent or received by the user
+#   matches   matches the user is part of
+#   messages  messages in the user's matches
+#   deck      global: anything shown on other users' swipe cards
+#   presence  global: the current presence flush interval
+
+GLOBAL = 0
+GLOBAL_SCOPES = ("deck", "presence")
+
+# Token of a scope that has never been bumped.
+INITIAL = "0"
+
+
+def _new_token():
+    return uuid.uuid4().hex[:16]
+
+
+def _presence_version():
+    # last_active is written by batched flushes, not through signals, so
+    # its version moves once per flush interval (every second at 0).
+    return str(int(time.time()) // max(settings.PRESENCE_FLUSH_INTERVAL, 1))
+
+
+def _lookup(scopes, user_id):
+    owners = {scope: GLOBAL if scope in GLOBAL_SCOPES else user_id for scope in scopes}
+    lookup = Q()
+    for scope, owner in owners.items():
+        if scope != "presence":
+            lookup |= Q(scope=scope, user_id=owner)
+    return lookup
+
+
+def _tokens(scopes, stored):
+    return [
+        _presence_version() if scope == "presence" else stored.get(scope, INITIAL)
+        for scope in scopes
+    ]
+
+
+def get_versions(scopes, user_id):
+    """
+    Tokens for `scopes` of a user (global scopes ignore `user_id`), read
+    in one query.
+    """
+    lookup = _lookup(scopes, user_id)
+    stored = {}
+    if lookup:
+        stored = dict(ChangeVersion.objects.filter(lookup).values_list("scope", "token"))
+    return _tokens(scopes, stored)
+
+
+async def aget_versions(scopes, user_id):
+    lookup = _lookup(scopes, user_id)
+    stored = {}
+    if lookup:
+        rows = ChangeVersion.objects.filter(lookup).values_list("scope", "token")
+        stored = {scope: token async for scope, token in rows}
+    return _tokens(scopes, stored)
+
+
+def get_version(scope, user_id=GLOBAL):
+    return get_versions([scope], user_id)[0]
+
+
+def bump(scope, *user_ids):
+    if not user_ids:
+        return
+    ChangeVersion.objects.bulk_create(
+        [ChangeVersion(scope=scope, user_id=user_id, token=_new_token()) for user_id in set(user_ids)],
+        update_conflicts=True,
+        unique_fields=["scope", "user_id"],
+        update_fields=["token"],
+    )
+
+
+def bump_global(scope):
+    bump(scope, GLOBAL)
+
+
+def _etag(request, scopes, versions):
+    # Kept for the response cache, whose keys use the same tokens.
+    request.change_versions = dict(zip(scopes, versions))
+    parts = [
+        request.get_full_path(),
+        getattr(request, "accepted_media_type", ""),
+        *versions,
+    ]
+    return hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=12).hexdigest()
+
+
+def compute_etag(request, scopes):
+    return _etag(request, scopes, get_versions(scopes, request.user.pk))
+
+
+async def acompute_etag(request, scopes):
+    return _etag(request, scopes, await aget_versions(scopes, request.user.pk))
+
+
+def _matches(etag, if_none_match):
+    # GZipMiddleware weakens ETags, so compare ignoring the W/ prefix.
+    candidates = {tag.removeprefix("W/") for tag in parse_etags(if_none_match)}
+    return "*" in candidates or quote_etag(etag) in candidates
+
+
+def _finish(response, etag):
+    if response.status_code in (200, 304):
+        response["ETag"] = quote_etag(etag)
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_get(*scopes, extra_scopes=None):
+    """
+    Decorates an APIView.get: answers 304 Not Modified when the client's
+    If-None-Match still matches the versions of `scopes` for the user.
+    `extra_scopes`, if given, is called with the request and returns more
+    scopes for scopes that depend on query parameters.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            request_scopes = scopes + tuple(extra_scopes(request)) if extra_scopes else scopes
+            etag = compute_etag(request, request_scopes)
+            if _matches(etag, request.headers.get("If-None-Match", "")):
+                return _finish(Response(status=304), etag)
+            return _finish(handler(self, request, *args, **kwargs), etag)
+        return wrapper
+    return decorator
+
+
+def async_conditional_get(*scopes, extra_scopes=None):
+    """
+    conditional_get() for the async views (async_views.py): the versions
+    are read with the async ORM and a 304 is a plain Django response.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(self, request, *args, **kwargs):
+            request_scopes = scopes + tuple(extra_scopes(request)) if extra_scopes else scopes
+            etag = await acompute_etag(request, request_scopes)
+            if _matches(etag, request.headers.get("If-None-Match", "")):
+                return _finish(HttpResponseNotModified(), etag)
+            return _finish(await handler(self, request, *args, **kwargs), etag)
+        return wrapper
+    return decorator
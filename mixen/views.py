@@ -1,26 +1,78 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated, SAFE_METHODS
+from rest_framework.authentication import SessionAuthentication
 from django.contrib.auth import authenticate
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import router
+from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from .models import (
     User, Profile, ProfileImage, VerificationVideo,
-    VerificationStatus, Like, Match, Message, submit_for_review
+    VerificationStatus, Like, Match, Message, MatchReadState, submit_for_review,
+    ReportReason, Block, record_like, send_message, mark_match_read, report_user, block_user,
 )
-
+from .deletion import request_account_deletion
+
+from . import archive
+from .exports import EXPORT_STREAMS, EXPORT_FORMATS, export_rows, render_rows
+from .caching import response_cache
+from .queries import (
+    SORT_DEFAULT, SORT_ACTIVE, swipe_page, parse_page, parse_sort, swipe_card, user_matches, match_card,
+    visible_users, likes_received, exclude_blocked,
+)
+from .routers import routing_scope, enable_replica_reads, finish_routing, pin_to_primary
+from .search import search_profile_ids
 from .serializers import RegisterSerializer
 from .utils import spend_coins
-from mixen import models
+from .versions import conditional_get
+
+
+# ---------------------------
+# DATABASE ROUTING
+# ---------------------------
+class DatabaseRoutingMixin:
+    """
+    Tracks the authenticated user for the primary/replica router. Safe
+    requests on views with `replica_reads = True` read from the replica;
+    any write pins the user to the primary so they see their own changes.
+    """
+    replica_reads = False
+
+    def dispatch(self, request, *args, **kwargs):
+        with routing_scope() as state:
+            self.routing_state = state
+            try:
+                response = super().dispatch(request, *args, **kwargs)
+            except ObjectDoesNotExist:
+                # The replica has not caught up with a row the primary
+                # already has (e.g. a profile just created): retry there.
+                if not state.replica:
+                    raise
+                state.replica, state.primary_only = False, True
+                response = super().dispatch(request, *args, **kwargs)
+        finish_routing(state, response)
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.user.is_authenticated:
+            self.routing_state.user_id = request.user.pk
+            if self.replica_reads and request.method in SAFE_METHODS:
+                enable_replica_reads(self.routing_state, request)
 
 
 # ---------------------------
 # 1️⃣ REGISTER
 # ---------------------------
-class RegisterView(APIView):
+class RegisterView(DatabaseRoutingMixin, APIView):
     permission_classes = [AllowAny]
 
     def post(self, request):
@@ -30,6 +82,8 @@ class RegisterView(APIView):
             profile = user.profile
             profile.coins = 30
             profile.save()
+            # The new account is read from the primary until the replica has it.
+            self.routing_state.user_id = user.id
             return Response(
                 {"message": "Account created successfully. You have 30 free coins!", "user_id": user.id},
                 status=status.HTTP_201_CREATED
@@ -57,11 +111,13 @@ class LoginView(APIView):
                 status=403,
             )
 
-        return Response({
+        response = Response({
             "message": "Login successful",
             "user_id": user.id,
             "username": user.username
         })
+        pin_to_primary(response, user.id)
+        return response
 
 
 # ---------------------------
@@ -86,18 +142,20 @@ class JWTLoginView(APIView):
 
         refresh = RefreshToken.for_user(user)
 
-        return Response({
+        response = Response({
             "access": str(refresh.access_token),
             "refresh": str(refresh),
             "user_id": user.id,
             "username": user.username
         })
+        pin_to_primary(response, user.id)
+        return response
 
 
 # ---------------------------
 # 4️⃣ UPLOAD PROFILE IMAGE
 # ---------------------------
-class UploadProfileImagesView(APIView):
+class UploadProfileImagesView(DatabaseRoutingMixin, APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
@@ -113,7 +171,7 @@ class UploadProfileImagesView(APIView):
 # ---------------------------
 # 5️⃣ UPLOAD VERIFICATION VIDEO
 # ---------------------------
-class UploadVerificationVideoView(APIView):
+class UploadVerificationVideoView(DatabaseRoutingMixin, APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
@@ -131,7 +189,7 @@ class UploadVerificationVideoView(APIView):
 # ---------------------------
 # 6️⃣ SUBMIT PROFILE FOR REVIEW
 # ---------------------------
-class SubmitProfileForReviewView(APIView):
+class SubmitProfileForReviewView(DatabaseRoutingMixin, APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
@@ -146,56 +204,68 @@ class SubmitProfileForReviewView(APIView):
 # ---------------------------
 # 7️⃣ PROFILE STATUS
 # ---------------------------
-class ProfileStatusView(APIView):
+class ProfileStatusView(DatabaseRoutingMixin, APIView):
+    replica_reads = True
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
+    @conditional_get("profile")
     def get(self, request):
-        profile = request.user.profile
-        return Response({
-            "status": profile.status,
-            "rejection_reason": profile.rejection_reason,
-            "coins": profile.coins
-        })
+        # Only primary reads are cached, so entries are never filled from
+        # a lagging replica.
+        cacheable = not self.routing_state.replica
+        data = response_cache.get("status", request) if cacheable else None
+        if data is None:
+            profile = request.user.profile
+            data = {
+                "status": profile.status,
+                "rejection_reason": profile.rejection_reason,
+                "coins": profile.coins
+            }
+            if cacheable:
+                response_cache.set("status", request, data)
+        return Response(data)
 
 
 # ---------------------------
 # 8️⃣ SWIPE USERS
 # ---------------------------
-class SwipeUsersView(APIView):
+class SwipeUsersView(DatabaseRoutingMixin, APIView):
+    replica_reads = True
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
+    @conditional_get(
+        "deck", "likes", "matches",
+        # "active" order follows last_active, which presence flushes move.
+        extra_scopes=lambda request: (
+            ("presence",) if parse_sort(request.query_params.get("sort")) == SORT_ACTIVE else ()
+        ),
+    )
     def get(self, request):
-        current_user = request.user
-        users = User.objects.filter(profile__status=VerificationStatus.APPROVED).exclude(id=current_user.id)
-
-        liked_ids = Like.objects.filter(from_user=current_user).values_list('to_user_id', flat=True)
-        matched_ids1 = Match.objects.filter(user1=current_user).values_list('user2_id', flat=True)
-        matched_ids2 = Match.objects.filter(user2=current_user).values_list('user1_id', flat=True)
-
-        excluded_ids = list(liked_ids) + list(matched_ids1) + list(matched_ids2)
-        users_to_swipe = users.exclude(id__in=excluded_ids)
-
-        data = []
-        for u in users_to_swipe:
-            profile_image = u.profile.images.first()
-            image_url = profile_image.image_url if profile_image else None
-            data.append({
-                "id": u.id,
-                "username": u.username,
-                "age": u.profile.age,
-                "bio": u.profile.bio,
-                "profile_image": image_url
-            })
-
+        page = parse_page(request.query_params.get("page"))
+        if page is None:
+            return Response({"error": "page must be a positive number"}, status=400)
+        sort = parse_sort(request.query_params.get("sort"))
+        if sort is None:
+            return Response({"error": "sort must be one of: default, active"}, status=400)
+
+        # Only the default first page is cached: it is what every app launch
+        # loads, and "active" order shifts as presence is flushed. Replica
+        # reads are not cached (see ProfileStatusView).
+        cacheable = page == 1 and sort == SORT_DEFAULT and not self.routing_state.replica
+        data = response_cache.get("swipe", request) if cacheable else None
+        if data is None:
+            data = [swipe_card(u) for u in swipe_page(request.user, page, sort)]
+            if cacheable:
+                response_cache.set("swipe", request, data)
         return Response(data)
 
 
 # ---------------------------
 # 9️⃣ LIKE A USER
 # ---------------------------
-class LikeUserView(APIView):
+class LikeUserView(DatabaseRoutingMixin, APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
@@ -205,7 +275,7 @@ class LikeUserView(APIView):
         if not to_user_id:
             return Response({"error": "to_user_id is required"}, status=400)
         try:
-            to_user = User.objects.get(id=to_user_id)
+            to_user = visible_users(request.user).get(id=to_user_id)
         except User.DoesNotExist:
             return Response({"error": "User not found"}, status=404)
         if from_user == to_user:
@@ -213,10 +283,7 @@ class LikeUserView(APIView):
         if Like.objects.filter(from_user=from_user, to_user=to_user).exists():
             return Response({"error": "You already liked this user"}, status=400)
 
-        Like.objects.create(from_user=from_user, to_user=to_user)
-
-        if Like.objects.filter(from_user=to_user, to_user=from_user).exists():
-            Match.objects.create(user1=from_user, user2=to_user)
+        if record_like(from_user, to_user):
             return Response({"success": "It's a match! 🎉"}, status=201)
 
         return Response({"success": "User liked"}, status=201)
@@ -225,28 +292,25 @@ class LikeUserView(APIView):
 # ---------------------------
 # 🔟 VIEW MATCHES
 # ---------------------------
-class MatchesListView(APIView):
+class MatchesListView(DatabaseRoutingMixin, APIView):
+    replica_reads = True
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
+    @conditional_get("matches", "presence")
     def get(self, request):
         user = request.user
-        matches1 = Match.objects.filter(user1=user)
-        matches2 = Match.objects.filter(user2=user)
-
-        all_matches = []
-        for m in matches1:
-            all_matches.append({"id": m.user2.id, "username": m.user2.username})
-        for m in matches2:
-            all_matches.append({"id": m.user1.id, "username": m.user1.username})
-
+        sort = parse_sort(request.query_params.get("sort"))
+        if sort is None:
+            return Response({"error": "sort must be one of: default, active"}, status=400)
+        all_matches = [match_card(m, user) for m in user_matches(user, sort)]
         return Response(all_matches)
 
 
 # ---------------------------
 # 1️⃣1️⃣ SEND MESSAGE (COSTS 1 COIN)
 # ---------------------------
-class SendMessageView(APIView):
+class SendMessageView(DatabaseRoutingMixin, APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
@@ -259,7 +323,7 @@ class SendMessageView(APIView):
             return Response({"error": "to_user and text required"}, status=400)
 
         try:
-            receiver = User.objects.get(id=to_user_id)
+            receiver = visible_users(request.user).get(id=to_user_id)
         except User.DoesNotExist:
             return Response({"error": "User not found"}, status=404)
 
@@ -267,14 +331,13 @@ class SendMessageView(APIView):
             return Response({"error": "Not enough coins. Please buy more."}, status=400)
 
         match = Match.objects.filter(
-            (models.Q(user1=sender, user2=receiver)) |
-            (models.Q(user1=receiver, user2=sender))
+            Q(user1=sender, user2=receiver) | Q(user1=receiver, user2=sender)
         ).first()
 
         if not match:
             return Response({"error": "You are not matched with this user"}, status=403)
 
-        Message.objects.create(match=match, sender=sender, text=text)
+        send_message(match, sender, text)
 
         return Response({
             "success": "Message sent",
@@ -285,7 +348,7 @@ class SendMessageView(APIView):
 # ---------------------------
 # 1️⃣2️⃣ VIEW WHO LIKED YOU (COSTS 5 COINS)
 # ---------------------------
-class ViewLikesView(APIView):
+class ViewLikesView(DatabaseRoutingMixin, APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
 
@@ -296,10 +359,308 @@ class ViewLikesView(APIView):
         if not spend_coins(user, coin_cost):
             return Response({"error": "Not enough coins to view likes."}, status=400)
 
-        likes = user.likes_received.all()
+        likes = likes_received(user)
         data = [{"from_user": like.from_user.username, "created_at": like.created_at} for like in likes]
 
         return Response({
             "likes": data,
             "remaining_coins": user.profile.coins
         })
+
+
+# ---------------------------
+# 1️⃣3️⃣ MESSAGE HISTORY
+# ---------------------------
+class MessageHistoryView(DatabaseRoutingMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+    replica_reads = True
+
+    @conditional_get("matches", "messages")
+    def get(self, request):
+        user = request.user
+        other_id = request.query_params.get("user")
+        if not other_id:
+            return Response({"error": "user is required"}, status=400)
+        if not str(other_id).isdigit():
+            return Response({"error": "user must be a number"}, status=400)
+
+        match = exclude_blocked(
+            Match.objects.filter(Q(user1=user, user2_id=other_id) | Q(user1_id=other_id, user2=user)),
+            user, "user1", "user2",
+        ).first()
+        if not match:
+            return Response({"error": "You are not matched with this user"}, status=403)
+
+        try:
+            limit = min(int(request.query_params.get("limit", 50)), 100)
+        except ValueError:
+            return Response({"error": "limit must be a number"}, status=400)
+
+        # Page backwards with ?before=<timestamp>&before_id=<id> of the
+        # oldest message seen; the id breaks ties between equal timestamps.
+        messages = Message.objects.for_match(match.id)
+        before_ts = before_id = None
+        before = request.query_params.get("before")
+        if before:
+            before_ts = parse_datetime(before)
+            if before_ts is None:
+                return Response({"error": "before must be an ISO timestamp"}, status=400)
+            if timezone.is_naive(before_ts):
+                before_ts = timezone.make_aware(before_ts)
+            before_id = request.query_params.get("before_id")
+            if before_id is None:
+                messages = messages.filter(timestamp__lt=before_ts)
+            elif not before_id.isdigit():
+                return Response({"error": "before_id must be a number"}, status=400)
+            else:
+                before_id = int(before_id)
+                messages = messages.filter(Q(timestamp__lt=before_ts) | Q(timestamp=before_ts, id__lt=before_id))
+
+        page = list(messages.order_by("-timestamp", "-id")[:limit])
+        page.reverse()
+        data = [
+            {"id": m.id, "sender_id": m.sender_id, "text": m.text, "timestamp": m.timestamp}
+            for m in page
+        ]
+
+        # Archived messages are older than the table's, except rows an
+        # archive run left behind (see archive_messages). Once the page
+        # reaches back to the archive, merge both by (timestamp, id).
+        archived_until = archive.archived_until(match.id)
+        if archived_until is not None and (len(data) < limit or page[0].timestamp <= archived_until):
+            shown = {m["id"] for m in data}
+            archived = archive.read_archived(match.id, before=before_ts, before_id=before_id, limit=limit)
+            data = sorted(
+                [m for m in archived if m["id"] not in shown] + data,
+                key=lambda m: (m["timestamp"], m["id"]),
+            )[-limit:]
+
+        # Read receipt: the other user has read every message up to here.
+        read_up_to = (
+            MatchReadState.objects.filter(match=match, user_id=other_id)
+            .values_list("last_read_at", flat=True)
+            .first()
+        )
+        return Response({"messages": data, "read_up_to": read_up_to})
+
+
+# ---------------------------
+# 1️⃣4️⃣ MARK MESSAGES READ
+# ---------------------------
+class MarkMessagesReadView(DatabaseRoutingMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def post(self, request):
+        user = request.user
+        other_id = request.data.get("user")
+        if not other_id:
+            return Response({"error": "user is required"}, status=400)
+        if not str(other_id).isdigit():
+            return Response({"error": "user must be a number"}, status=400)
+
+        match = exclude_blocked(
+            Match.objects.filter(Q(user1=user, user2_id=other_id) | Q(user1_id=other_id, user2=user)),
+            user, "user1", "user2",
+        ).first()
+        if not match:
+            return Response({"error": "You are not matched with this user"}, status=403)
+
+        # Timestamp of the newest message the client displayed: only what
+        # the user has seen is marked read.
+        up_to = parse_datetime(str(request.data.get("up_to", "")))
+        if up_to is None:
+            return Response({"error": "up_to must be an ISO timestamp"}, status=400)
+        if timezone.is_naive(up_to):
+            up_to = timezone.make_aware(up_to)
+
+        unread_total = mark_match_read(match, user, min(up_to, timezone.now()))
+        return Response({"success": "Messages marked as read", "unread_total": unread_total})
+
+
+# ---------------------------
+# 1️⃣5️⃣ UNREAD COUNTS
+# ---------------------------
+class UnreadCountsView(DatabaseRoutingMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    @conditional_get("messages")
+    def get(self, request):
+        # Reads the primary: these counters change on every send and read.
+        user = request.user
+        total = Profile.objects.values_list("unread_messages", flat=True).get(user=user)
+        states = (
+            MatchReadState.objects.filter(user=user, unread_count__gt=0)
+            .select_related("match")
+        )
+        per_match = [
+            {
+                "user_id": s.match.user2_id if s.match.user1_id == user.id else s.match.user1_id,
+                "unread": s.unread_count,
+            }
+            for s in states
+        ]
+        return Response({"total": total, "matches": per_match})
+
+
+# ---------------------------
+# 1️⃣6️⃣ ANALYTICS EXPORT (STAFF ONLY)
+# ---------------------------
+class AnalyticsExportView(APIView):
+    permission_classes = [IsAdminUser]
+    authentication_classes = [JWTAuthentication, SessionAuthentication]
+
+    def get(self, request, stream):
+        if stream not in EXPORT_STREAMS:
+            return Response({"error": f"Unknown stream. Use one of: {', '.join(EXPORT_STREAMS)}"}, status=404)
+
+        # Not "format": DRF reserves that query parameter for renderers.
+        fmt = request.query_params.get("output", "csv")
+        if fmt not in EXPORT_FORMATS:
+            return Response({"error": "output must be csv or jsonl"}, status=400)
+
+        bounds = {}
+        for param in ("since", "until"):
+            value = request.query_params.get(param)
+            if value:
+                bounds[param] = parse_datetime(value)
+                if bounds[param] is None:
+                    return Response({"error": f"{param} must be an ISO timestamp"}, status=400)
+
+        rows = export_rows(stream, cursor=request.query_params.get("cursor"), **bounds)
+        content_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+        response = StreamingHttpResponse(render_rows(stream, rows, fmt), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{stream}.{fmt}"'
+        return response
+
+
+# ---------------------------
+# 1️⃣7️⃣ RESPONSE CACHE STATS (STAFF ONLY)
+# ---------------------------
+class ResponseCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+    authentication_classes = [JWTAuthentication, SessionAuthentication]
+
+    def get(self, request):
+        # Counters are per server process.
+        return Response(response_cache.stats())
+
+
+# ---------------------------
+# 1️⃣8️⃣ SEARCH PROFILES
+# ---------------------------
+class SearchProfilesView(DatabaseRoutingMixin, APIView):
+    replica_reads = True
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def get(self, request):
+        text = request.query_params.get("q", "").strip()
+        if not text:
+            return Response({"error": "q is required"}, status=400)
+        page = parse_page(request.query_params.get("page"))
+        if page is None:
+            return Response({"error": "page must be a positive number"}, status=400)
+
+        size = settings.SEARCH_PAGE_SIZE
+        using = router.db_for_read(Profile)
+        ids = search_profile_ids(
+            text, exclude_user=request.user, limit=size, offset=(page - 1) * size, using=using
+        )
+        profiles = Profile.objects.using(using).select_related("user").in_bulk(ids)
+
+        data = []
+        for profile_id in ids:
+            profile = profiles[profile_id]
+            data.append({
+                "id": profile.user_id,
+                "username": profile.user.username,
+                "age": profile.age,
+                "bio": profile.bio,
+                "location": profile.location,
+                "looking_for": profile.looking_for,
+            })
+        return Response(data)
+
+
+# ---------------------------
+# 1️⃣9️⃣ DELETE ACCOUNT
+# ---------------------------
+class DeleteAccountView(DatabaseRoutingMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def post(self, request):
+        # Deactivates now; the data is removed by process_account_deletions.
+        job = request_account_deletion(request.user)
+        return Response(
+            {"success": "Your account has been deactivated and will be deleted shortly.", "deletion_id": job.id},
+            status=202,
+        )
+
+
+# ---------------------------
+# 2️⃣0️⃣ BLOCK / UNBLOCK A USER
+# ---------------------------
+class BlockUserView(DatabaseRoutingMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def post(self, request):
+        user_id = request.data.get("user_id")
+        if not user_id:
+            return Response({"error": "user_id is required"}, status=400)
+        if str(user_id) == str(request.user.pk):
+            return Response({"error": "You cannot block yourself"}, status=400)
+        try:
+            blocked = User.objects.get(id=user_id)
+        except (User.DoesNotExist, ValueError):
+            return Response({"error": "User not found"}, status=404)
+        block_user(request.user, blocked)
+        return Response({"success": "User blocked"}, status=201)
+
+
+class UnblockUserView(DatabaseRoutingMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def post(self, request):
+        user_id = request.data.get("user_id")
+        if not user_id:
+            return Response({"error": "user_id is required"}, status=400)
+        # Deleted one by one so the signal handlers see each block.
+        try:
+            blocks = Block.objects.filter(blocker=request.user, blocked_id=user_id)
+        except ValueError:
+            return Response({"error": "User not found"}, status=404)
+        if not blocks.exists():
+            return Response({"error": "You have not blocked this user"}, status=404)
+        for block in blocks:
+            block.delete()
+        return Response({"success": "User unblocked"})
+
+
+# ---------------------------
+# 2️⃣1️⃣ REPORT A USER
+# ---------------------------
+class ReportUserView(DatabaseRoutingMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [JWTAuthentication]
+
+    def post(self, request):
+        user_id = request.data.get("user_id")
+        reason = request.data.get("reason")
+        if not user_id or reason not in ReportReason.values:
+            return Response(
+                {"error": f"user_id and reason ({', '.join(ReportReason.values)}) are required"}, status=400
+            )
+        if str(user_id) == str(request.user.pk):
+            return Response({"error": "You cannot report yourself"}, status=400)
+        try:
+            reported = User.objects.get(id=user_id)
+        except (User.DoesNotExist, ValueError):
+            return Response({"error": "User not found"}, status=404)
+        report = report_user(request.user, reported, reason, request.data.get("details", ""))
+        return Response({"success": "Report received. This user has been blocked.", "report_id": report.id}, status=201)
@@ -0,0 +1,40 @@
+"""
+Production launcher config:
+
+    gunicorn -c mixen_backend/gunicorn.conf.py
+
+The app is imported and warmed in the master (see warmup.py) and then
+forked, so workers start with URLconf, models and serializers loaded and
+share that memory copy-on-write. MIXEN_SERVER=asgi serves the ASGI app
+through uvicorn workers instead.
+"""
+
+import multiprocessing
+import os
+import time
+
+from mixen_backend import warmup
+
+_config_loaded = time.perf_counter()
+
+bind = os.environ.get("MIXEN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("MIXEN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+
+if os.environ.get("MIXEN_SERVER") == "asgi":
+    wsgi_app = "mixen_backend.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    wsgi_app = "mixen_backend.wsgi:application"
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported and before
+    # the first worker is forked.
+    timings = [("import app", time.perf_counter() - _config_loaded)]
+    timings += warmup.warm_up()
+    server.log.info("Startup: %s", warmup.format_timings(timings))
+
+
+def post_fork(server, worker):
+    warmup.warm_worker()
@@ -1,3 +1,4 @@
+import importlib.util
 import os
 from pathlib import Path
 
@@ -21,12 +22,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'django.middleware.gzip.GZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'mixen.middleware.PresenceMiddleware',
 ]
 
 ROOT_URLCONF = 'mixen_backend.urls'
@@ -48,13 +51,83 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'mixen_backend.wsgi.application'
 
-DATABASES = {
-    'default': {
+# ----------------- Database -----------------
+# MIXEN_DB_PROFILE=production switches SQLite to WAL journaling with a busy
+# timeout and persistent connections, so concurrent likes, messages and coin
+# spends queue up instead of failing with "database is locked".
+DB_PROFILE = os.environ.get('MIXEN_DB_PROFILE', 'development')
+
+SQLITE_PRODUCTION_PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA cache_size = -20000',    # ~20 MB page cache per connection
+    'PRAGMA mmap_size = 268435456',  # 256 MB memory-mapped reads
+    'PRAGMA temp_store = MEMORY',
+)
+
+
+def sqlite_database(path, profile=DB_PROFILE):
+    config = {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': path,
     }
+    if profile == 'production':
+        config.update({
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'timeout': 20,
+                # Take the write lock up front so writers wait on the busy
+                # timeout instead of failing on a read-to-write upgrade.
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': '; '.join(SQLITE_PRODUCTION_PRAGMAS),
+            },
+        })
+    return config
+
+
+# MIXEN_DB_PATH points the primary at another SQLite file.
+DATABASES = {
+    'default': sqlite_database(os.environ.get('MIXEN_DB_PATH', BASE_DIR / 'db.sqlite3')),
 }
 
+# Read replica for the read-heavy endpoints. Locally a copy of db.sqlite3
+# (e.g. MIXEN_REPLICA_DB=replica.sqlite3) stands in for a real replica.
+REPLICA_DATABASE = 'replica'
+if os.environ.get('MIXEN_REPLICA_DB'):
+    DATABASES[REPLICA_DATABASE] = sqlite_database(BASE_DIR / os.environ['MIXEN_REPLICA_DB'])
+    DATABASES[REPLICA_DATABASE]['TEST'] = {'MIRROR': 'default'}
+
+# After a write, a user's reads stay on the primary for this many seconds so
+# they always see their own likes, matches and coin spends. The pin is a
+# signed cookie (and X-Mixen-Primary header) returned with the response.
+REPLICA_STICKY_SECONDS = 10
+
+# Message storage shards. MIXEN_MESSAGE_SHARDS=N spreads conversations over N
+# SQLite files by hashing the match id; by default messages stay in 'default'.
+# Each shard needs its table: run `manage.py migrate --database messages_N`
+# for every shard, then `manage.py rebalance_message_shards` after adding one.
+MESSAGE_SHARDS = ['default']
+if os.environ.get('MIXEN_MESSAGE_SHARDS'):
+    MESSAGE_SHARDS = []
+    for i in range(int(os.environ['MIXEN_MESSAGE_SHARDS'])):
+        alias = f'messages_{i}'
+        DATABASES[alias] = sqlite_database(BASE_DIR / f'{alias}.sqlite3')
+        MESSAGE_SHARDS.append(alias)
+
+# Messages older than this are moved to compressed per-match segment files
+# by `manage.py archive_messages`; history reads merge them back in.
+MESSAGE_ARCHIVE_ROOT = BASE_DIR / 'archive' / 'messages'
+MESSAGE_ARCHIVE_AFTER_DAYS = 180
+
+# Outbox events older than this are dropped by `manage.py prune_outbox`.
+OUTBOX_RETENTION_DAYS = 7
+
+DATABASE_ROUTERS = [
+    'mixen.routers.MessageShardRouter',
+    'mixen.routers.PrimaryReplicaRouter',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',},
@@ -83,6 +156,43 @@ DEFAULT_FROM_EMAIL = 'Mixen <godwinsenwin@gmail.com>'
 
 AUTH_USER_MODEL = 'mixen.User'
 
+# ----------------- Caches -----------------
+# 'responses' holds per-user API payloads (profile status, first swipe
+# page) keyed by the change versions they were built from, so a write
+# retires them in every process without any invalidation. LocMemCache
+# keeps a copy per worker; set MIXEN_REDIS_URL to share one between them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mixen-responses',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+if os.environ.get('MIXEN_REDIS_URL'):
+    CACHES['responses'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['MIXEN_REDIS_URL'],
+        'TIMEOUT': 300,
+    }
+RESPONSE_CACHE_ALIAS = 'responses'
+
+SWIPE_PAGE_SIZE = 50
+SEARCH_PAGE_SIZE = 20
+
+# Unfiltered admin changelists above this many rows show an estimated
+# total instead of running COUNT(*).
+ADMIN_EXACT_COUNT_LIMIT = 50000
+
+# Presence: activity is kept in memory and written to Profile.last_active
+# rounded down to PRESENCE_GRANULARITY seconds, at most once per user per
+# bucket, in batched UPDATEs every PRESENCE_FLUSH_INTERVAL seconds.
+PRESENCE_GRANULARITY = 60
+PRESENCE_FLUSH_INTERVAL = 30
+
 # ----------------- REST Framework -----------------
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -91,4 +201,19 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': [
+        'mixen.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'mixen.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
+
+# MessagePack is optional: served to clients sending Accept: application/msgpack
+# when the msgpack package is installed.
+if importlib.util.find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(1, 'mixen.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].insert(1, 'mixen.renderers.MessagePackParser')
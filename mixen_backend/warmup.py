@@ -0,0 +1,121 @@
+"""
+Start-up warm-up for pre-forking servers.
+
+gunicorn.conf.py loads the app in the master and calls warm_up() before
+any worker is forked, so imports, URL resolution and ORM metadata are
+paid once and shared copy-on-write by every worker. Each worker then only
+opens its own database connections (warm_worker()).
+"""
+
+import gc
+import importlib
+import time
+
+
+def load_application(kind="wsgi"):
+    """
+    Imports mixen_backend.wsgi or mixen_backend.asgi, which sets Django up.
+    """
+    return importlib.import_module(f"mixen_backend.{kind}").application
+
+
+def _warm_urlconf():
+    from django.urls import get_resolver
+
+    resolver = get_resolver()
+    # Builds the reverse lookup tables and compiles every pattern.
+    resolver.reverse_dict
+    resolver.resolve("/api/status/")
+
+
+def _warm_models():
+    from django.apps import apps
+
+    for model in apps.get_models():
+        model._meta.get_fields()
+        model._meta.concrete_fields
+        model._meta.related_objects
+        # Compiles (without running) a query, loading the SQL compiler.
+        model._default_manager.all().query.sql_with_params()
+
+
+def _warm_serializers():
+    from rest_framework.settings import api_settings
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+
+    from mixen.renderers import ORJSONRenderer
+    from mixen.serializers import RegisterSerializer
+
+    # Importing the configured classes is what DRF does on a first request.
+    api_settings.DEFAULT_RENDERER_CLASSES
+    api_settings.DEFAULT_PARSER_CLASSES
+    api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    api_settings.DEFAULT_PERMISSION_CLASSES
+    JWTAuthentication()
+    # Loads PyJWT and its algorithms, otherwise imported by the first
+    # authenticated request.
+    importlib.import_module("rest_framework_simplejwt.state")
+    RegisterSerializer().fields
+    ORJSONRenderer().render({"warm": True})
+
+
+def _warm_caches():
+    from django.conf import settings
+    from django.core.cache import caches
+
+    for alias in settings.CACHES:
+        caches[alias].get("mixen:warm-up")
+
+
+def _warm_database():
+    from django.db import connections
+
+    for connection in connections.all():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    # Connections must not cross a fork; workers open their own.
+    connections.close_all()
+
+
+PHASES = [
+    ("urlconf", _warm_urlconf),
+    ("models", _warm_models),
+    ("serializers", _warm_serializers),
+    ("caches", _warm_caches),
+    ("database", _warm_database),
+]
+
+
+def warm_up(freeze=True):
+    """
+    Runs each warm-up phase and, with `freeze`, moves every object created
+    so far into the GC's permanent generation so collections in workers
+    never touch (and un-share) those pages. Returns (phase, seconds) pairs.
+    """
+    timings = []
+    for name, phase in PHASES:
+        start = time.perf_counter()
+        phase()
+        timings.append((name, time.perf_counter() - start))
+    if freeze:
+        start = time.perf_counter()
+        gc.collect()
+        gc.freeze()
+        timings.append(("gc.freeze", time.perf_counter() - start))
+    return timings
+
+
+def warm_worker():
+    """
+    Opens this worker's default database connection up front, so with
+    persistent connections (CONN_MAX_AGE) the first request reuses it.
+    """
+    from django.db import connection
+
+    connection.ensure_connection()
+
+
+def format_timings(timings):
+    total = sum(seconds for _, seconds in timings)
+    phases = ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in timings)
+    return f"{phases} (total {total * 1000:.1f} ms)"